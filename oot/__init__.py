@@ -1 +1,3 @@
+from oot.layers import parse_layers
 from oot.main import parse_file
+from oot.render_pool import RenderPool
@@ -0,0 +1,81 @@
+import threading
+from collections import OrderedDict
+from typing import Generic, Hashable, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+
+class LRUCache(Generic[V]):
+    """
+    Thread-safe mapping that evicts its least recently used entries.
+
+    Entries can be given a weight, e.g. their size in bytes; the cache then
+    also evicts entries while their total weight exceeds `max_weight`.
+    """
+
+    def __init__(self, max_entries: int, max_weight: Optional[int] = None) -> None:
+        """
+        Initialize an LRUCache instance.
+
+        Args:
+            max_entries: The maximum number of entries to keep.
+            max_weight: The maximum total weight of the entries, or None for no
+                limit.
+        """
+        self.max_entries = max_entries
+        self.max_weight = max_weight
+        self._entries: "OrderedDict[Hashable, Tuple[V, int]]" = OrderedDict()
+        self._weight = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[V]:
+        """
+        Get a cached value, marking it as recently used.
+
+        Args:
+            key: The cache key.
+
+        Returns:
+            The cached value, or None if it is not cached.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: Hashable, value: V, weight: int = 1) -> None:
+        """
+        Cache a value, evicting the least recently used entries beyond the limits.
+
+        A value heavier than `max_weight` on its own is not cached.
+
+        Args:
+            key: The cache key.
+            value: The value to cache.
+            weight: The weight of the value.
+        """
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._weight -= previous[1]
+            if self.max_weight is not None and weight > self.max_weight:
+                return
+            self._entries[key] = (value, weight)
+            self._weight += weight
+            while len(self._entries) > self.max_entries or (
+                self.max_weight is not None and self._weight > self.max_weight
+            ):
+                self._weight -= self._entries.popitem(last=False)[1][1]
+
+    def clear(self) -> None:
+        """
+        Drop all cached values.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._weight = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
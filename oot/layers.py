@@ -0,0 +1,187 @@
+import copy
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Hashable, Optional, Sequence, Tuple, Union
+
+from .cache import LRUCache
+from .m_exceptions import ValidationError
+from .parser import parse_yaml_with_jinja
+from .schema_validator import get_validator
+
+logger = logging.getLogger(__name__)
+
+LIST_STRATEGIES = ("replace", "append", "prepend", "unique")
+MAX_CACHE_ENTRIES = 256
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+
+# Entries are weighed by the size of the layer files they were built from.
+_cache: LRUCache[Dict[str, Any]] = LRUCache(MAX_CACHE_ENTRIES, MAX_CACHE_BYTES)
+
+
+def parse_layers(
+    file_paths: Sequence[Union[str, Path]],
+    context: Optional[Dict[str, str]] = None,
+    validation_schema: Optional[str] = None,
+    list_strategy: str = "replace",
+    coerce: bool = False,
+) -> Dict[str, Any]:
+    """
+    Parse several files and deep-merge them, later files overriding earlier ones.
+
+    Parsed layers and merged prefixes (e.g. base + env/prod) are cached, so
+    variants sharing their leading layers only parse and merge what differs.
+    Cache entries are invalidated when a layer file changes, or when the
+    context or environment variables differ; call clear_layer_cache() after
+    changing files a layer only includes. The cache size is bounded by
+    configure_layer_cache().
+
+    Args:
+        file_paths: The paths to the files, from base to most specific.
+        context: Variables to be used in the templates.
+        validation_schema: An optional path to a JSON schema to validate the
+            merged data.
+        list_strategy: How lists are merged: "replace", "append", "prepend" or
+            "unique" (append items not already present).
+        coerce: Whether to coerce values to the types declared by the schema
+            while validating.
+
+    Returns:
+        The merged data.
+
+    Raises:
+        ValueError: If no files or an unknown list strategy are given.
+        ValidationError: If a schema is provided and the merged data does not
+            conform to it.
+    """
+    if not file_paths:
+        raise ValueError("At least one file is required.")
+    if list_strategy not in LIST_STRATEGIES:
+        raise ValueError(
+            f"Invalid list strategy: {list_strategy}. "
+            f"Expected one of: {', '.join(LIST_STRATEGIES)}"
+        )
+
+    paths = [Path(file_path) for file_path in file_paths]
+    for file_path in paths:
+        if not file_path.is_file():
+            logger.error(f"File not found: {file_path}")
+            raise FileNotFoundError(f"File not found: {file_path}")
+
+    context_key = _context_key(context)
+    layer_keys = [_layer_key(file_path, context_key) for file_path in paths]
+    sizes = [file_path.stat().st_size for file_path in paths]
+
+    merged, start = None, 0
+    for end in range(len(layer_keys), 0, -1):
+        merged = _cache.get(("merged", list_strategy, tuple(layer_keys[:end])))
+        if merged is not None:
+            start = end
+            break
+
+    for index in range(start, len(paths)):
+        layer = _cache.get(("layer", layer_keys[index]))
+        if layer is None:
+            layer = parse_yaml_with_jinja(paths[index], context)
+            _cache.put(("layer", layer_keys[index]), layer, sizes[index])
+        merged = layer if merged is None else deep_merge(merged, layer, list_strategy)
+        _cache.put(
+            ("merged", list_strategy, tuple(layer_keys[: index + 1])),
+            merged,
+            sum(sizes[: index + 1]),
+        )
+
+    # Cached structures are shared between variants; hand out a private copy.
+    data = copy.deepcopy(merged)
+
+    if validation_schema is not None:
+        try:
+            validator = get_validator(validation_schema)
+            data = validator.validate(data, coerce=coerce)
+        except ValidationError as e:
+            logger.error(f"Validation error: {e}")
+            raise ValidationError(f"Validation error: {e}", path=e.path)
+        except Exception as e:
+            logger.error(f"Validation error: {e}")
+            raise ValidationError(f"Validation error: {e}")
+
+    return data
+
+
+def deep_merge(base: Any, override: Any, list_strategy: str = "replace") -> Any:
+    """
+    Deep-merge two values without modifying either.
+
+    Mappings are merged key by key, lists according to `list_strategy`, and
+    any other value in `override` replaces the one in `base`. The result may
+    share unchanged children with the inputs.
+
+    Args:
+        base: The value to merge into.
+        override: The value taking precedence.
+        list_strategy: How lists are merged: "replace", "append", "prepend" or
+            "unique".
+
+    Returns:
+        The merged value.
+    """
+    if isinstance(base, dict) and isinstance(override, dict):
+        merged = dict(base)
+        for key, value in override.items():
+            if key in merged:
+                merged[key] = deep_merge(merged[key], value, list_strategy)
+            else:
+                merged[key] = value
+        return merged
+
+    if isinstance(base, list) and isinstance(override, list):
+        if list_strategy == "append":
+            return base + override
+        if list_strategy == "prepend":
+            return override + base
+        if list_strategy == "unique":
+            return base + [item for item in override if item not in base]
+
+    return override
+
+
+def clear_layer_cache() -> None:
+    """
+    Drop all cached layers and merged prefixes.
+    """
+    _cache.clear()
+
+
+def configure_layer_cache(
+    max_entries: int = MAX_CACHE_ENTRIES, max_bytes: Optional[int] = MAX_CACHE_BYTES
+) -> None:
+    """
+    Set the limits of the layer cache and drop its current entries.
+
+    Args:
+        max_entries: The maximum number of cached layers and merged prefixes;
+            0 disables the cache.
+        max_bytes: The maximum total size of the layer files the cached entries
+            were built from, or None for no limit. Parsed data takes several
+            times the size of its source.
+    """
+    _cache.max_entries = max_entries
+    _cache.max_weight = max_bytes
+    _cache.clear()
+
+
+def _context_key(context: Optional[Dict[str, str]]) -> Tuple[str, int]:
+    """
+    Build a hashable key for the template context and environment variables.
+    """
+    context_json = json.dumps(context or {}, sort_keys=True, default=repr)
+    return context_json, hash(frozenset(os.environ.items()))
+
+
+def _layer_key(file_path: Path, context_key: Tuple[str, int]) -> Hashable:
+    """
+    Build a cache key identifying a layer file revision and its context.
+    """
+    stat = file_path.stat()
+    return str(file_path.resolve()), stat.st_mtime_ns, stat.st_size, context_key
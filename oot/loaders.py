@@ -1,15 +1,21 @@
 import logging
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Callable, Optional, Tuple
+from types import CodeType
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
 
-from jinja2 import BaseLoader
+from jinja2 import BaseLoader, meta
 
+from .cache import LRUCache
 from .m_exceptions import TemplateNotFoundError
 
 logger = logging.getLogger(__name__)
 
+# The text between environment variables and their (name, default, line) slots.
+EnvPlan = Tuple[Tuple[str, ...], Tuple[Tuple[str, str, int], ...]]
+
 
 class CustomYAMLTemplateLoader(BaseLoader):
     """
@@ -17,6 +23,19 @@ class CustomYAMLTemplateLoader(BaseLoader):
     """
 
     ENV_VAR_PATTERN = re.compile(r"\$\{([^:}]+)(?::([^}]+))?\}")
+    REFERENCE_PATTERN = re.compile(r"\{%[-+]?\s*(?:include|import|from|extends)\b")
+    PREFETCH_WORKERS = 8
+    MAX_CACHED_TEMPLATES = 64
+    MAX_CACHED_SOURCE_LENGTH = 256 * 1024
+
+    # Shared across loaders: template filename -> (source hash, referenced names).
+    _dependency_index: Dict[str, Tuple[int, Tuple[str, ...]]] = {}
+    # Shared across loaders: (name, filename, source hash, environment settings)
+    # -> compiled template code.
+    _code_cache: LRUCache[CodeType] = LRUCache(MAX_CACHED_TEMPLATES)
+    # Shared across loaders: (filename, mtime, size) -> environment variable
+    # plan of the raw file.
+    _env_plans: LRUCache[EnvPlan] = LRUCache(MAX_CACHED_TEMPLATES)
 
     def __init__(self, template_path: str, variables: Optional[dict] = None) -> None:
         """
@@ -31,6 +50,8 @@ class CustomYAMLTemplateLoader(BaseLoader):
             raise ValueError(f"Invalid directory path: {self.path}")
 
         self.variables = variables if variables else {}
+        self.line_shifts: Dict[str, List[Tuple[int, int]]] = {}
+        self._prefetched: Dict[str, Tuple[str, str, List[Tuple[int, int]]]] = {}
 
     def get_source(self, env, template: str) -> Tuple[str, str, Callable[[], bool]]:
         """
@@ -47,20 +68,227 @@ class CustomYAMLTemplateLoader(BaseLoader):
         Raises:
             TemplateNotFoundError: If the template file cannot be found.
         """
-        filename = self.path / template
-        if not filename.exists():
+        loaded = self._prefetched.pop(template, None)
+        if loaded is None:
+            loaded = self._load(template)
+        template_content, filename, line_shifts = loaded
+
+        if line_shifts:
+            self.line_shifts[template] = line_shifts
+        else:
+            self.line_shifts.pop(template, None)
+
+        return template_content, filename, lambda: False
+
+    def load(self, environment, name: str, globals=None):
+        """
+        Load a template, reusing compiled code for unchanged sources.
+
+        Args:
+            environment: The Jinja2 environment.
+            name: The name of the template file.
+            globals: Optional globals for the template.
+
+        Returns:
+            The loaded template.
+        """
+        if globals is None:
+            globals = {}
+        source, filename, uptodate = self.get_source(environment, name)
+
+        bcc = environment.bytecode_cache
+        if bcc is not None:
+            bucket = bcc.get_bucket(environment, name, filename, source)
+            code = bucket.code
+            if code is None:
+                code = environment.compile(source, name, filename)
+                bucket.code = code
+                bcc.set_bucket(bucket)
+        else:
+            code = self.compile(environment, name, source, filename)
+
+        return environment.template_class.from_code(
+            environment, code, globals, uptodate
+        )
+
+    def compile(self, env, name: str, source: str, filename: str) -> CodeType:
+        """
+        Compile a preprocessed template, reusing the code compiled for the
+        same template, source and environment settings by any loader in this
+        process. Sources longer than MAX_CACHED_SOURCE_LENGTH are always
+        compiled afresh.
+
+        Args:
+            env: The Jinja2 environment.
+            name: The name of the template file.
+            source: The preprocessed template source.
+            filename: The path of the template file.
+
+        Returns:
+            The compiled template code.
+        """
+        if len(source) > self.MAX_CACHED_SOURCE_LENGTH:
+            # Code for large templates is not worth keeping alive between parses.
+            return env.compile(source, name, filename)
+
+        key = (name, filename, hash(source), _compile_settings(env))
+        code = self._code_cache.get(key)
+        if code is None:
+            code = env.compile(source, name, filename)
+            self._code_cache.put(key, code)
+        return code
+
+    def prefetch(self, env, template: str) -> None:
+        """
+        Load a template and every template it statically includes, imports or
+        extends, reading and preprocessing each round of dependencies
+        concurrently.
+
+        Dependencies are discovered from the template AST and cached in a
+        dependency index keyed by file, so a template tree that was loaded
+        before is fetched in a single concurrent round. Templates that fail to
+        load are skipped here and reported by get_source when rendered.
+
+        Args:
+            env: The Jinja2 environment.
+            template: The name of the root template file.
+        """
+        seen: Set[str] = set()
+        pending = {template}
+        while pending:
+            names = sorted(self._indexed_closure(pending) - seen)
+            seen.update(names)
+            pending = set()
+            for name, loaded in zip(names, self._load_many(names)):
+                if loaded is None:
+                    continue
+                self._prefetched[name] = loaded
+                pending.update(self._dependencies(env, loaded[1], loaded[0]))
+            pending -= seen
+
+    def _indexed_closure(self, names: Iterable[str]) -> Set[str]:
+        """
+        Expand template names with their dependencies known from the index.
+        """
+        closure: Set[str] = set()
+        stack = list(names)
+        while stack:
+            name = stack.pop()
+            if name in closure:
+                continue
+            closure.add(name)
+            entry = self._dependency_index.get(str(self.path / name))
+            if entry is not None:
+                stack.extend(entry[1])
+        return closure
+
+    def _load_many(
+        self, names: List[str]
+    ) -> List[Optional[Tuple[str, str, List[Tuple[int, int]]]]]:
+        """
+        Load several templates, concurrently when there is more than one.
+        """
+        if len(names) == 1:
+            return [self._try_load(names[0])]
+        workers = min(self.PREFETCH_WORKERS, len(names))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(self._try_load, names))
+
+    def _try_load(
+        self, template: str
+    ) -> Optional[Tuple[str, str, List[Tuple[int, int]]]]:
+        """
+        Load a template, returning None instead of raising.
+        """
+        try:
+            return self._read(template)
+        except FileNotFoundError:
+            # Missing templates may sit in branches that are never rendered;
+            # get_source reports them if they are.
+            logger.debug(f"Skipping prefetch of missing template {template}")
+        except Exception as e:
+            logger.debug(f"Skipping prefetch of {template}: {e}")
+        return None
+
+    def _dependencies(self, env, filename: str, source: str) -> Tuple[str, ...]:
+        """
+        Find the templates a preprocessed template statically references.
+
+        Args:
+            env: The Jinja2 environment.
+            filename: The path of the template file.
+            source: The preprocessed template source.
+
+        Returns:
+            The names of the referenced templates.
+        """
+        source_hash = hash(source)
+        entry = self._dependency_index.get(filename)
+        if entry is not None and entry[0] == source_hash:
+            return entry[1]
+
+        if not self.REFERENCE_PATTERN.search(source):
+            return ()
+
+        try:
+            referenced = meta.find_referenced_templates(env.parse(source))
+            names = tuple(name for name in referenced if isinstance(name, str))
+        except Exception as e:
+            # Syntax errors are reported when the template is compiled.
+            logger.debug(f"Could not scan {filename} for dependencies: {e}")
+            names = ()
+        self._dependency_index[filename] = (source_hash, names)
+        return names
+
+    def _load(self, template: str) -> Tuple[str, str, List[Tuple[int, int]]]:
+        """
+        Read and preprocess a template file.
+
+        Args:
+            template: The name of the template file.
+
+        Returns:
+            The preprocessed source, the path of the file and the line shifts
+            recorded during preprocessing.
+
+        Raises:
+            TemplateNotFoundError: If the template file cannot be found.
+        """
+        try:
+            return self._read(template)
+        except FileNotFoundError:
             raise TemplateNotFoundError(template)
 
+    def _read(self, template: str) -> Tuple[str, str, List[Tuple[int, int]]]:
+        """
+        Read and preprocess a template file, raising FileNotFoundError if it
+        does not exist.
+
+        The environment variable plan of files up to MAX_CACHED_SOURCE_LENGTH
+        is cached while the file is unchanged, so warm loads only substitute
+        the current values without reading or scanning the file.
+        """
+        filename = self.path / template
         try:
-            with open(filename, "r") as file:
-                yaml_content = file.read()
+            stat = os.stat(filename)
+            key = (str(filename), stat.st_mtime_ns, stat.st_size)
+            plan = self._env_plans.get(key)
+            if plan is None:
+                with open(filename, "r") as file:
+                    yaml_content = file.read()
+        except FileNotFoundError:
+            raise
         except Exception as e:
             logger.error(f"Error reading file {filename}: {e}")
             raise
 
-        template_content = self.preprocess_yaml(yaml_content)
-
-        return template_content, str(filename), lambda: False
+        if plan is None:
+            plan = self._plan(yaml_content)
+            if len(yaml_content) <= self.MAX_CACHED_SOURCE_LENGTH:
+                self._env_plans.put(key, plan)
+            del yaml_content
+        template_content, line_shifts = self._apply_plan(plan)
+        return template_content, str(filename), line_shifts
 
     def preprocess_yaml(self, yaml_content: str) -> str:
         """
@@ -75,13 +303,101 @@ class CustomYAMLTemplateLoader(BaseLoader):
         Raises:
             ValueError: If the YAML content is not valid.
         """
-        INVALID_ENV_VAR_PATTERN = re.compile(r"\$\{:\}")
+        return self._preprocess(yaml_content)[0]
+
+    def _preprocess(self, yaml_content: str) -> Tuple[str, List[Tuple[int, int]]]:
+        """
+        Preprocess a YAML template and record how substitutions shift its lines.
+
+        Args:
+            yaml_content: The content of the YAML template.
+
+        Returns:
+            The preprocessed YAML content and a list of (line, extra lines)
+            pairs, one per substituted value spanning several lines.
+
+        Raises:
+            ValueError: If the YAML content is not valid.
+        """
+        return self._apply_plan(self._plan(yaml_content))
+
+    def _plan(self, yaml_content: str) -> EnvPlan:
+        """
+        Split a YAML template into its text and environment variable slots.
 
+        Args:
+            yaml_content: The content of the YAML template.
+
+        Returns:
+            The text between the variables and one (name, default, line) slot
+            per variable, where line is the 1-based line it appears on.
+
+        Raises:
+            ValueError: If the YAML content is not valid.
+        """
+        INVALID_ENV_VAR_PATTERN = re.compile(r"\$\{:\}")
         if INVALID_ENV_VAR_PATTERN.search(yaml_content):
             raise ValueError("Invalid environment variable in YAML content.")
 
-        def replace_env_var(match):
+        texts: List[str] = []
+        slots: List[Tuple[str, str, int]] = []
+        position, line = 0, 1
+        for match in self.ENV_VAR_PATTERN.finditer(yaml_content):
+            line += yaml_content.count("\n", position, match.start())
+            texts.append(yaml_content[position : match.start()])
             var, default = match.groups()
-            return os.environ.get(var.strip(), default if default else "")
+            slots.append((var.strip(), default if default else "", line))
+            line += match.group().count("\n")
+            position = match.end()
+        texts.append(yaml_content[position:])
+        return tuple(texts), tuple(slots)
+
+    @staticmethod
+    def _apply_plan(plan: EnvPlan) -> Tuple[str, List[Tuple[int, int]]]:
+        """
+        Substitute the current environment variables into a template plan.
+
+        Args:
+            plan: The text and variable slots of the template.
 
-        return self.ENV_VAR_PATTERN.sub(replace_env_var, yaml_content)
+        Returns:
+            The preprocessed YAML content and a list of (line, extra lines)
+            pairs, one per substituted value spanning several lines.
+        """
+        texts, slots = plan
+        parts = [texts[0]]
+        line_shifts: List[Tuple[int, int]] = []
+        for (var, default, line), text in zip(slots, texts[1:]):
+            value = os.environ.get(var, default)
+            extra = value.count("\n")
+            if extra:
+                line_shifts.append((line, extra))
+            parts.append(value)
+            parts.append(text)
+        return "".join(parts), line_shifts
+
+
+def _compile_settings(env) -> Tuple[Any, ...]:
+    """
+    Collect the environment settings that change the code a template compiles to.
+    """
+    return (
+        env.block_start_string,
+        env.block_end_string,
+        env.variable_start_string,
+        env.variable_end_string,
+        env.comment_start_string,
+        env.comment_end_string,
+        env.line_statement_prefix,
+        env.line_comment_prefix,
+        env.trim_blocks,
+        env.lstrip_blocks,
+        env.newline_sequence,
+        env.keep_trailing_newline,
+        env.optimized,
+        env.autoescape,
+        env.finalize,
+        env.is_async,
+        env.code_generator_class,
+        tuple(sorted(env.extensions)),
+    )
@@ -1,4 +1,5 @@
 import logging
+from typing import List, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +19,9 @@ class TemplateNotFoundError(Exception):
         super().__init__(self.message)
         logger.error(self.message)
 
+    def __reduce__(self):
+        return _restore, (self.__class__, self.args, self.__dict__)
+
 
 class YAMLParseError(Exception):
     """
@@ -25,15 +29,25 @@ class YAMLParseError(Exception):
 
     Attributes:
         message: Explanation of the error.
+        file_name: The template file the error originates from, if known.
+        line: The 1-based template line the error originates from, if known.
     """
 
     def __init__(
-        self, message: str = "An error occurred during the YAML parsing process"
+        self,
+        message: str = "An error occurred during the YAML parsing process",
+        file_name: Optional[str] = None,
+        line: Optional[int] = None,
     ) -> None:
         self.message = message
+        self.file_name = file_name
+        self.line = line
         super().__init__(self.message)
         logger.error(self.message)
 
+    def __reduce__(self):
+        return _restore, (self.__class__, self.args, self.__dict__)
+
 
 class ValidationError(Exception):
     """
@@ -41,11 +55,31 @@ class ValidationError(Exception):
 
     Attributes:
         message: Explanation of the error.
+        path: The path to the offending value, e.g. ["data", "key"], if known.
+        line: The 1-based template line of the offending value, if known.
     """
 
     def __init__(
-        self, message: str = "An error occurred during the validation process"
+        self,
+        message: str = "An error occurred during the validation process",
+        path: Optional[List[str]] = None,
+        line: Optional[int] = None,
     ) -> None:
         self.message = message
+        self.path = path
+        self.line = line
         super().__init__(self.message)
         logger.error(self.message)
+
+    def __reduce__(self):
+        return _restore, (self.__class__, self.args, self.__dict__)
+
+
+def _restore(cls: type, args: tuple, state: dict) -> Exception:
+    """
+    Recreate an unpickled exception without running __init__, so errors
+    raised in worker processes are not logged a second time.
+    """
+    exception = cls.__new__(cls, *args)
+    exception.__dict__.update(state)
+    return exception
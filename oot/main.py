@@ -3,8 +3,8 @@ from pathlib import Path
 from typing import Any, Dict, Optional, Union
 
 from .m_exceptions import ValidationError
-from .parser import parse_yaml_with_jinja
-from .schema_validator import SchemaValidator
+from .parser import parse_yaml_with_source_map
+from .schema_validator import get_validator
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +13,7 @@ def parse_file(
     file_path: Union[str, Path],
     context: Optional[Dict[str, str]] = None,
     validation_schema: Optional[str] = None,
+    coerce: bool = False,
 ) -> Union[str, Dict[str, Any]]:
     """
     Parse a file with options to parse Jinja templating, environment variables, or both.
@@ -20,7 +21,9 @@ def parse_file(
     Args:
         file_path: The path to the file.
         context: Variables to be used in the template.
-        validator: An optional SchemaValidator instance to validate the parsed data.
+        validation_schema: An optional path to a JSON schema to validate the parsed data.
+        coerce: Whether to coerce values to the types declared by the schema
+            while validating.
 
     Returns:
         The parsed data.
@@ -33,12 +36,19 @@ def parse_file(
         logger.error(f"File not found: {file_path}")
         raise FileNotFoundError(f"File not found: {file_path}")
 
-    data = parse_yaml_with_jinja(str(file_path), context)
+    data, source_map = parse_yaml_with_source_map(str(file_path), context)
 
     if validation_schema is not None:
         try:
-            validator = SchemaValidator(validation_schema)
-            validator.validate(data)
+            validator = get_validator(validation_schema)
+            data = validator.validate(data, coerce=coerce)
+        except ValidationError as e:
+            line = source_map.locate(e.path)
+            location = f" ({file_path}:{line})" if line is not None else ""
+            logger.error(f"Validation error{location}: {e}")
+            raise ValidationError(
+                f"Validation error{location}: {e}", path=e.path, line=line
+            )
         except Exception as e:
             logger.error(f"Validation error: {e}")
             raise ValidationError(f"Validation error: {e}")
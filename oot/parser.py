@@ -1,15 +1,25 @@
 import logging
+from array import array
+from functools import partial
 from pathlib import Path
-from typing import Any, Dict, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import yaml
-from jinja2 import Environment
+from jinja2 import Environment, Template
 
 from .loaders import CustomYAMLTemplateLoader
 from .m_exceptions import YAMLParseError
+from .source_map import RenderedTemplate, SourceMap
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader  # type: ignore[assignment]
 
 logger = logging.getLogger(__name__)
 
+JINJA_MARKERS = ("{{", "{%", "{#")
+
 
 def parse_yaml_with_jinja(
     file_path: Union[str, Path], variables: Optional[Dict[str, str]] = None
@@ -27,16 +37,191 @@ def parse_yaml_with_jinja(
     Raises:
         YAMLParseError: If there's an error parsing the YAML data.
     """
+    return parse_yaml_with_source_map(file_path, variables)[0]
+
+
+def parse_yaml_with_source_map(
+    file_path: Union[str, Path], variables: Optional[Dict[str, str]] = None
+) -> Tuple[Dict[str, Any], SourceMap]:
+    """
+    Parse a YAML file with Jinja templates, keeping a map from the rendered
+    YAML back to the template lines.
+
+    Args:
+        file_path: The path to the YAML file.
+        variables: Optional variables to be used in the templates.
+
+    Returns:
+        The parsed YAML data and the source map of the rendered YAML.
+
+    Raises:
+        YAMLParseError: If there's an error parsing the YAML data. YAML syntax
+            errors report the template line they originate from.
+    """
     file_path = Path(file_path)
     if not file_path.is_file():
         raise FileNotFoundError(f"File not found: {file_path}")
 
-    env = Environment(loader=CustomYAMLTemplateLoader(str(file_path.parent), variables))
+    try:
+        rendered_yaml, source_map = _render_file(file_path, variables or {})
+    except Exception as e:
+        raise YAMLParseError("An error occurred while parsing the YAML file.") from e
 
     try:
-        template = env.get_template(file_path.name)
-        rendered_yaml = template.render(variables or {})
-        parsed_yaml = yaml.safe_load(rendered_yaml)
-        return parsed_yaml or {}
+        parsed_yaml = yaml.load(rendered_yaml, Loader=SafeLoader)
+    except yaml.MarkedYAMLError as e:
+        mark = e.problem_mark or e.context_mark
+        if mark is None:
+            raise YAMLParseError(
+                "An error occurred while parsing the YAML file."
+            ) from e
+        # Errors at the end of the stream point at the last line with content.
+        last_line = rendered_yaml.count("\n", 0, len(rendered_yaml.rstrip()))
+        line = source_map.template_line(min(mark.line, last_line))
+        raise YAMLParseError(
+            "An error occurred while parsing the YAML file at "
+            f"{file_path}:{line}: {e.problem or e.context}",
+            file_name=str(file_path),
+            line=line,
+        ) from e
     except Exception as e:
         raise YAMLParseError("An error occurred while parsing the YAML file.") from e
+
+    return parsed_yaml or {}, source_map
+
+
+def _render_file(file_path: Path, variables: Dict[str, Any]) -> Tuple[str, SourceMap]:
+    """
+    Preprocess and render a template file.
+
+    The Jinja environment, templates and preprocessed source are local to this
+    function so they are released before the rendered YAML is parsed; only
+    compiled code is kept in the loader's bounded cache. Files without Jinja
+    syntax skip compilation and rendering.
+
+    Args:
+        file_path: The path to the template file.
+        variables: Variables to be used in the template.
+
+    Returns:
+        The rendered text and its source map.
+    """
+    source, line_shifts, template = _load_template(file_path, variables)
+    render = partial(_render_again, file_path, dict(variables))
+    if template is None:
+        return source, SourceMap(str(file_path), array("q"), render, line_shifts)
+
+    del source
+    try:
+        rendered, chunk_map = _render_with_source_map(template, variables)
+    finally:
+        _release_templates(template)
+    return rendered, SourceMap(str(file_path), chunk_map, render, line_shifts)
+
+
+def _load_template(
+    file_path: Path, variables: Dict[str, Any]
+) -> Tuple[str, Optional[List[Tuple[int, int]]], Optional[Template]]:
+    """
+    Preprocess a template file and compile it if it contains Jinja syntax.
+
+    Args:
+        file_path: The path to the template file.
+        variables: Variables to be used in the template.
+
+    Returns:
+        The preprocessed source, the line shifts recorded while preprocessing
+        it and the compiled template, or None for files without Jinja syntax.
+    """
+    loader = CustomYAMLTemplateLoader(str(file_path.parent), variables)
+    env = Environment(loader=loader)
+
+    loader.prefetch(env, file_path.name)
+    source, filename, uptodate = loader.get_source(env, file_path.name)
+    line_shifts = loader.line_shifts.get(file_path.name)
+
+    if not any(marker in source for marker in JINJA_MARKERS):
+        return source, line_shifts, None
+
+    code = loader.compile(env, file_path.name, source, filename)
+    template = env.template_class.from_code(env, code, env.make_globals(None), uptodate)
+    return source, line_shifts, template
+
+
+def _render_again(file_path: Path, variables: Dict[str, Any]) -> RenderedTemplate:
+    """
+    Preprocess and render a template file again to resolve error locations.
+
+    Args:
+        file_path: The path to the template file.
+        variables: Variables to be used in the template.
+
+    Returns:
+        The preprocessed source, the rendered text, the code of the render
+        function and the debug info of the template.
+    """
+    source, _, template = _load_template(file_path, variables)
+    if template is None:
+        return RenderedTemplate(source, source, None, "")
+    try:
+        rendered = template.render(variables)
+        return RenderedTemplate(
+            source, rendered, template.root_render_func.__code__, template._debug_info
+        )
+    finally:
+        _release_templates(template)
+
+
+def _release_templates(template: Template) -> None:
+    """
+    Break the reference cycles of a template and the templates it loaded.
+
+    Templates reference themselves through their module namespace; clearing
+    it frees them without waiting for the cyclic garbage collector.
+    """
+    cache = template.environment.cache
+    for loaded in (template, *(cache.values() if cache else ())):
+        loaded.root_render_func.__globals__.clear()
+
+
+def _render_with_source_map(
+    template: Template, variables: Dict[str, Any]
+) -> Tuple[str, "array[int]"]:
+    """
+    Render a template while recording which instruction of the compiled
+    template emitted the first and each multi-line output chunk.
+
+    Only instruction offsets are recorded while rendering; the source map
+    resolves them to template lines when an error location is requested.
+
+    Args:
+        template: The Jinja template to render.
+        variables: Variables to be used in the template.
+
+    Returns:
+        The rendered text and flat (rendered line, instruction offset, start,
+        end) chunk records.
+    """
+    chunks: List[str] = []
+    # Flat records; tuples would cost several times the rendered text for
+    # templates emitting many lines.
+    chunk_map = array("q")
+    rendered_line = 0
+    offset = 0
+
+    generator = template.root_render_func(template.new_context(variables))
+    frame = generator.gi_frame
+    try:
+        for chunk in generator:
+            chunks.append(chunk)
+            if not chunk_map or "\n" in chunk:
+                # f_lineno scans the line table on every access; f_lasti is O(1).
+                chunk_map.extend(
+                    (rendered_line, frame.f_lasti, offset, offset + len(chunk))
+                )
+                rendered_line += chunk.count("\n")
+            offset += len(chunk)
+    except Exception:
+        template.environment.handle_exception()
+
+    return "".join(chunks), chunk_map
@@ -0,0 +1,185 @@
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Union
+
+from .layers import parse_layers
+from .main import parse_file
+
+logger = logging.getLogger(__name__)
+
+
+class RenderPool:
+    """
+    Parses files in a pool of long-lived worker processes.
+
+    Requests are (function, arguments) messages sent over multiprocessing
+    queues; responses are the parsed data or the raised exception. Workers live
+    as long as the pool, so the compiled template, environment variable
+    plan, dependency, layer and validator caches of each worker stay warm
+    across requests, and rendering does not contend for the GIL with the
+    calling process.
+
+    Workers are started when the pool is created and resolve environment
+    variables against the caller's environment at that time, not at request
+    time.
+    """
+
+    def __init__(self, workers: Optional[int] = None, mp_context=None) -> None:
+        """
+        Initialize a RenderPool instance.
+
+        Args:
+            workers: The number of worker processes. Defaults to the number of
+                CPUs.
+            mp_context: An optional multiprocessing context used to start the
+                workers. Defaults to the "spawn" context: forking a process
+                that runs other threads can deadlock the workers, and
+                forkserver workers would inherit the environment of the fork
+                server rather than the current one.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=mp_context or multiprocessing.get_context("spawn"),
+        )
+        self.start()
+
+    def submit(
+        self,
+        file_path: Union[str, Path],
+        context: Optional[Dict[str, str]] = None,
+        validation_schema: Optional[str] = None,
+        coerce: bool = False,
+    ) -> "Future[Dict[str, Any]]":
+        """
+        Queue a parse_file request.
+
+        Args:
+            file_path: The path to the file.
+            context: Variables to be used in the template.
+            validation_schema: An optional path to a JSON schema to validate
+                the parsed data.
+            coerce: Whether to coerce values to the types declared by the
+                schema while validating.
+
+        Returns:
+            A future resolving to the parsed data.
+        """
+        return self._executor.submit(
+            parse_file, str(file_path), context, validation_schema, coerce
+        )
+
+    def parse_file(
+        self,
+        file_path: Union[str, Path],
+        context: Optional[Dict[str, str]] = None,
+        validation_schema: Optional[str] = None,
+        coerce: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Parse a file in a worker process. Mirrors oot.parse_file.
+
+        Args:
+            file_path: The path to the file.
+            context: Variables to be used in the template.
+            validation_schema: An optional path to a JSON schema to validate
+                the parsed data.
+            coerce: Whether to coerce values to the types declared by the
+                schema while validating.
+
+        Returns:
+            The parsed data.
+
+        Raises:
+            ValidationError: If a schema is provided and the data does not
+                conform to it.
+            YAMLParseError: If there's an error parsing the file.
+        """
+        return self.submit(file_path, context, validation_schema, coerce).result()
+
+    def submit_layers(
+        self,
+        file_paths: Sequence[Union[str, Path]],
+        context: Optional[Dict[str, str]] = None,
+        validation_schema: Optional[str] = None,
+        list_strategy: str = "replace",
+        coerce: bool = False,
+    ) -> "Future[Dict[str, Any]]":
+        """
+        Queue a parse_layers request.
+
+        Args:
+            file_paths: The paths to the files, from base to most specific.
+            context: Variables to be used in the templates.
+            validation_schema: An optional path to a JSON schema to validate
+                the merged data.
+            list_strategy: How lists are merged.
+            coerce: Whether to coerce values to the types declared by the
+                schema while validating.
+
+        Returns:
+            A future resolving to the merged data.
+        """
+        return self._executor.submit(
+            parse_layers,
+            [str(file_path) for file_path in file_paths],
+            context,
+            validation_schema,
+            list_strategy,
+            coerce,
+        )
+
+    def parse_layers(
+        self,
+        file_paths: Sequence[Union[str, Path]],
+        context: Optional[Dict[str, str]] = None,
+        validation_schema: Optional[str] = None,
+        list_strategy: str = "replace",
+        coerce: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Parse and merge layered files in a worker process. Mirrors
+        oot.parse_layers.
+
+        Args:
+            file_paths: The paths to the files, from base to most specific.
+            context: Variables to be used in the templates.
+            validation_schema: An optional path to a JSON schema to validate
+                the merged data.
+            list_strategy: How lists are merged.
+            coerce: Whether to coerce values to the types declared by the
+                schema while validating.
+
+        Returns:
+            The merged data.
+        """
+        return self.submit_layers(
+            file_paths, context, validation_schema, list_strategy, coerce
+        ).result()
+
+    def start(self) -> None:
+        """
+        Wait until all worker processes are running. Called when the pool is
+        created.
+        """
+        futures = [self._executor.submit(os.getpid) for _ in range(self.workers)]
+        for future in futures:
+            future.result()
+
+    def close(self, wait: bool = True) -> None:
+        """
+        Shut down the worker processes.
+
+        Args:
+            wait: Whether to wait for queued requests to finish.
+        """
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self) -> "RenderPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
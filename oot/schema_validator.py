@@ -1,15 +1,34 @@
+import copy
 import json
 import logging
+import re
+from datetime import date
 from json import JSONDecodeError
 from pathlib import Path
-from typing import Any, Callable, Dict, cast
+from urllib.parse import unquote
+from typing import Any, Callable, Dict, List, Optional, Union, cast
 
 import fastjsonschema
 
+from .cache import LRUCache
 from .m_exceptions import ValidationError
 
 logger = logging.getLogger(__name__)
 
+_TRUE_STRINGS = {"true", "yes", "on", "y", "1"}
+_FALSE_STRINGS = {"false", "no", "off", "n", "0"}
+_NULL_STRINGS = {"", "null", "none", "~"}
+
+_DURATION_UNITS = {"w": 604800, "d": 86400, "h": 3600, "m": 60, "s": 1}
+_NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+_UNIT_PART_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*([wdhms])")
+_UNIT_DURATION_PATTERN = re.compile(r"(?:\d+(?:\.\d+)?\s*[wdhms]\s*)+")
+_ISO_DURATION_PATTERN = re.compile(
+    r"P(?!$)(?:(\d+)W)?(?:(\d+)D)?(?:T(?=\d)(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?"
+)
+
+MAX_CACHED_VALIDATORS = 32
+
 
 class SchemaValidator:
     """
@@ -28,8 +47,13 @@ class SchemaValidator:
             raise FileNotFoundError(f"Schema file not found: {self._schema_path}")
         self._schema = self._load_schema()
         self._validator = cast(
-            Callable[[Dict[str, Any]], None], fastjsonschema.compile(self._schema)
+            Callable[[Dict[str, Any]], Dict[str, Any]],
+            fastjsonschema.compile(self._schema, use_default=False),
         )
+        # Fills in schema defaults; compiled on the first coercing validation.
+        self._coercing_validator: Optional[Callable[[Any], Dict[str, Any]]] = None
+        # Validators of anyOf/oneOf branches, compiled when coercion needs them.
+        self._branch_validators: Dict[int, Callable[[Any], Any]] = {}
 
     def _load_schema(self) -> Dict[str, Any]:
         """
@@ -49,17 +73,358 @@ class SchemaValidator:
                 "Invalid JSON format in schema file.", e.doc, e.pos
             ) from e
 
-    def validate(self, data: Dict[str, Any]) -> None:
+    def validate(self, data: Dict[str, Any], coerce: bool = False) -> Dict[str, Any]:
         """
         Validate data against the loaded JSON schema.
 
+        Without `coerce` the data is left untouched. With `coerce`, scalar
+        values that do not match their schema `type` or `format` (e.g. the
+        string "8080" for an integer, or "1h30m" for a duration) are converted
+        and missing properties with a schema `default` are filled in, both in
+        place. fastjsonschema cannot convert values, so coercion is a single
+        walk of the data followed by a single validation that also fills the
+        defaults.
+
+        Values are coerced from what YAML parsed, so numbers coerced to
+        strings lose their spelling (an unquoted 1.10 becomes "1.1"); quote
+        such values in the template to keep them verbatim.
+
         Args:
             data: The data to be validated. (Dict[str, Any])
+            coerce: Whether to coerce values to their schema types. (bool)
+
+        Returns:
+            The validated data. (Dict[str, Any])
 
         Raises:
             ValidationError: If the data doesn't conform to the schema.
         """
+        if coerce:
+            if self._coercing_validator is None:
+                self._coercing_validator = fastjsonschema.compile(
+                    self._schema, use_default=True
+                )
+            data = self._coerce(data, self._schema)
+        validator = self._coercing_validator if coerce else self._validator
         try:
-            self._validator(data)
+            return validator(data)
         except fastjsonschema.JsonSchemaException as e:
-            raise ValidationError(f"Validation error: {str(e)}") from e
+            raise ValidationError(f"Validation error: {str(e)}", path=e.path) from e
+
+    def _coerce(self, value: Any, schema: Any) -> Any:
+        """
+        Coerce a value and its children to the types declared by a schema.
+
+        Args:
+            value: The value to be coerced. (Any)
+            schema: The schema describing the value. (Any)
+
+        Returns:
+            The coerced value; containers are updated in place. (Any)
+        """
+        schema = self._resolve(schema)
+        if not isinstance(schema, dict):
+            return value
+
+        for subschema in schema.get("allOf", ()):
+            value = self._coerce(value, subschema)
+        for key in ("anyOf", "oneOf"):
+            if schema.get(key):
+                value = self._coerce_to_branch(value, schema[key])
+
+        if isinstance(value, dict):
+            properties = schema.get("properties", {})
+            additional = schema.get("additionalProperties")
+            for name, item in value.items():
+                item_schema = properties.get(name, additional)
+                if item_schema is not None:
+                    value[name] = self._coerce(item, item_schema)
+            return value
+
+        if isinstance(value, list):
+            items = schema.get("items")
+            for index, item in enumerate(value):
+                if isinstance(items, list):
+                    if index >= len(items):
+                        break
+                    value[index] = self._coerce(item, items[index])
+                else:
+                    value[index] = self._coerce(item, items)
+            return value
+
+        types = schema.get("type")
+        if types is None:
+            return value
+        types = types if isinstance(types, list) else [types]
+        if schema.get("format") == "duration":
+            value = _coerce_duration(value, types)
+        return _coerce_scalar(value, types)
+
+    def _coerce_to_branch(self, value: Any, branches: List[Any]) -> Any:
+        """
+        Coerce a value to the first of several alternative schemas it fits.
+
+        Values already matching a branch are left alone.
+
+        Args:
+            value: The value to be coerced. (Any)
+            branches: The alternative schemas. (List[Any])
+
+        Returns:
+            The value coerced for the first branch it then matches, or the
+            original value if there is none. (Any)
+        """
+        if any(self._matches_branch(value, branch) for branch in branches):
+            return value
+        for branch in branches:
+            candidate = self._coerce(copy.deepcopy(value), branch)
+            if self._matches_branch(candidate, branch):
+                return candidate
+        return value
+
+    def _matches_branch(self, value: Any, branch: Any) -> bool:
+        """
+        Check whether a value is valid against an anyOf/oneOf branch.
+
+        Branches are compiled together with the definitions of the root
+        schema so local references resolve; branches that still cannot be
+        compiled match nothing and are left to the full validation.
+        """
+        validator = self._branch_validators.get(id(branch))
+        if validator is None:
+            if isinstance(branch, dict):
+                branch_schema = {
+                    key: self._schema[key]
+                    for key in ("definitions", "$defs")
+                    if key in self._schema
+                }
+                branch_schema.update(branch)
+            else:
+                branch_schema = branch
+            try:
+                validator = fastjsonschema.compile(branch_schema, use_default=False)
+            except fastjsonschema.JsonSchemaDefinitionException as e:
+                logger.debug(f"Cannot compile schema branch {branch}: {e}")
+                validator = _match_nothing
+            self._branch_validators[id(branch)] = validator
+        try:
+            validator(value)
+        except fastjsonschema.JsonSchemaException:
+            return False
+        return True
+
+    def _resolve(self, schema: Any) -> Any:
+        """
+        Follow local "$ref" pointers (e.g. "#/definitions/port") to the
+        schema they reference.
+
+        Args:
+            schema: The schema, possibly a reference. (Any)
+
+        Returns:
+            The referenced schema, or the schema itself if it is not a local
+            reference or cannot be resolved. (Any)
+        """
+        seen = set()
+        while isinstance(schema, dict) and isinstance(schema.get("$ref"), str):
+            ref = schema["$ref"]
+            if not ref.startswith("#") or ref in seen:
+                break
+            seen.add(ref)
+            target: Any = self._schema
+            for part in filter(None, unquote(ref[1:]).split("/")):
+                part = part.replace("~1", "/").replace("~0", "~")
+                if isinstance(target, dict) and part in target:
+                    target = target[part]
+                elif isinstance(target, list) and part.isdigit():
+                    target = target[int(part)] if int(part) < len(target) else None
+                else:
+                    target = None
+                if target is None:
+                    logger.debug(f"Cannot resolve schema reference {ref}")
+                    return schema
+            schema = target
+        return schema
+
+
+def _match_nothing(value: Any) -> Any:
+    """
+    Reject every value; stands in for schema branches that cannot be compiled.
+    """
+    raise fastjsonschema.JsonSchemaValueException("cannot be validated")
+
+
+def _coerce_duration(value: Any, types: List[str]) -> Any:
+    """
+    Convert a duration to ISO 8601 for strings or to seconds for numbers.
+
+    Durations may be given as seconds, ISO 8601 ("PT1H30M") or unit suffixes
+    ("1h30m", "90s", "2d", "1w").
+
+    Args:
+        value: The duration to be converted. (Any)
+        types: The allowed JSON schema types. (List[str])
+
+    Returns:
+        The converted duration, or the original value if no conversion
+        applies. (Any)
+    """
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        if "string" in types and _ISO_DURATION_PATTERN.fullmatch(value):
+            return value
+        seconds = _duration_seconds(value)
+    elif isinstance(value, (int, float)):
+        seconds = value
+    else:
+        return value
+    if seconds is None:
+        return value
+
+    if "integer" in types and float(seconds).is_integer():
+        return int(seconds)
+    if "number" in types:
+        return seconds
+    if "string" in types and float(seconds).is_integer():
+        return _iso_duration(int(seconds))
+    return value
+
+
+def _duration_seconds(text: str) -> Optional[float]:
+    """
+    Parse a duration string into seconds, or None if it is not a duration.
+    """
+    text = text.strip()
+    iso = _ISO_DURATION_PATTERN.fullmatch(text.upper())
+    if _NUMBER_PATTERN.fullmatch(text):
+        parts = iter([(text, 1)])
+    elif iso:
+        parts = zip(iso.groups(), (604800, 86400, 3600, 60, 1))
+    elif _UNIT_DURATION_PATTERN.fullmatch(text.lower()):
+        parts = (
+            (amount, _DURATION_UNITS[unit])
+            for amount, unit in _UNIT_PART_PATTERN.findall(text.lower())
+        )
+    else:
+        return None
+    seconds = sum(float(amount) * unit for amount, unit in parts if amount)
+    return int(seconds) if seconds.is_integer() else seconds
+
+
+def _iso_duration(seconds: int) -> str:
+    """
+    Format whole seconds as an ISO 8601 duration, e.g. 5400 -> "PT1H30M".
+    """
+    days, seconds = divmod(seconds, 86400)
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    time = "".join(
+        f"{amount}{unit}"
+        for amount, unit in ((hours, "H"), (minutes, "M"), (seconds, "S"))
+        if amount
+    )
+    if not days and not time:
+        return "PT0S"
+    return f"P{f'{days}D' if days else ''}{f'T{time}' if time else ''}"
+
+
+def _coerce_scalar(value: Any, types: List[str]) -> Any:
+    """
+    Convert a scalar to the first of the given JSON schema types it fits.
+
+    Args:
+        value: The scalar to be converted. (Any)
+        types: The allowed JSON schema types. (List[str])
+
+    Returns:
+        The converted scalar, or the original value if no conversion applies.
+        (Any)
+    """
+    if _matches_type(value, types):
+        return value
+
+    for type_name in types:
+        if type_name == "string" and value is not None:
+            if isinstance(value, bool):
+                return "true" if value else "false"
+            if isinstance(value, (int, float)):
+                return str(value)
+            if isinstance(value, date):
+                return value.isoformat()
+        elif type_name == "integer":
+            if isinstance(value, str):
+                try:
+                    return int(value.strip())
+                except ValueError:
+                    continue
+            if isinstance(value, float) and value.is_integer():
+                return int(value)
+        elif type_name == "number" and isinstance(value, str):
+            try:
+                number = float(value.strip())
+            except ValueError:
+                continue
+            return int(number) if number.is_integer() and "." not in value else number
+        elif type_name == "boolean":
+            if isinstance(value, str) and value.strip().lower() in _TRUE_STRINGS:
+                return True
+            if isinstance(value, str) and value.strip().lower() in _FALSE_STRINGS:
+                return False
+            if (
+                isinstance(value, int)
+                and not isinstance(value, bool)
+                and value in (0, 1)
+            ):
+                return bool(value)
+        elif type_name == "null":
+            if isinstance(value, str) and value.strip().lower() in _NULL_STRINGS:
+                return None
+    return value
+
+
+def _matches_type(value: Any, types: List[str]) -> bool:
+    """
+    Check whether a scalar already has one of the given JSON schema types.
+    """
+    for type_name in types:
+        if type_name == "string" and isinstance(value, str):
+            return True
+        if type_name == "boolean" and isinstance(value, bool):
+            return True
+        if type_name == "null" and value is None:
+            return True
+        if isinstance(value, bool):
+            continue
+        if type_name == "integer" and isinstance(value, int):
+            return True
+        if type_name == "number" and isinstance(value, (int, float)):
+            return True
+    return False
+
+
+_validators: LRUCache[SchemaValidator] = LRUCache(MAX_CACHED_VALIDATORS)
+
+
+def get_validator(schema_path: Union[str, Path]) -> SchemaValidator:
+    """
+    Get a SchemaValidator for a schema file, reusing the compiled validator
+    while the file is unchanged.
+
+    Args:
+        schema_path: The path to the JSON schema file. (Union[str, Path])
+
+    Returns:
+        The validator for the schema. (SchemaValidator)
+    """
+    path = Path(schema_path)
+    if not path.is_file():
+        return SchemaValidator(str(schema_path))
+
+    stat = path.stat()
+    key = (str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+    validator = _validators.get(key)
+    if validator is None:
+        validator = SchemaValidator(str(schema_path))
+        _validators.put(key, validator)
+    return validator
@@ -0,0 +1,293 @@
+import dis
+import logging
+import re
+from bisect import bisect_left, bisect_right
+from types import CodeType
+from typing import Callable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+# Jinja treats each of these as a line break and renders it as "\n".
+NEWLINE_PATTERN = re.compile(r"\r\n|\r")
+# How far past the current template line a line of output is looked for.
+MAX_LINE_LOOKAHEAD = 256
+
+
+def original_line(line_shifts: Optional[List[Tuple[int, int]]], line: int) -> int:
+    """
+    Map a line of a preprocessed template back to the line of the raw file.
+
+    Args:
+        line_shifts: (raw line, extra lines) pairs recorded during preprocessing
+            for environment variables whose values span several lines.
+        line: The 1-based line in the preprocessed template.
+
+    Returns:
+        The 1-based line in the raw file.
+    """
+    offset = 0
+    for raw_line, extra in line_shifts or ():
+        start = raw_line + offset
+        if line <= start:
+            break
+        if line <= start + extra:
+            return raw_line
+        offset += extra
+    return line - offset
+
+
+class RenderedTemplate(NamedTuple):
+    """
+    A template rendered again to resolve error locations.
+    """
+
+    source: str
+    rendered: str
+    code: Optional[CodeType]
+    debug_info: str
+
+
+class SourceMap:
+    """
+    Maps lines of a rendered YAML document back to the template file lines
+    that produced them.
+    """
+
+    def __init__(
+        self,
+        file_name: str,
+        chunks: Sequence[int],
+        render: Callable[[], RenderedTemplate],
+        line_shifts: Optional[List[Tuple[int, int]]] = None,
+    ) -> None:
+        """
+        Initialize a SourceMap instance.
+
+        Only the chunk records are kept; the template is rendered again when
+        the first error location is requested, so the source and rendered
+        text need not stay alive while the data is parsed and validated.
+
+        Args:
+            file_name: The name of the template file.
+            chunks: Flat (rendered line, instruction offset, start, end)
+                records of the first and each multi-line output chunk, where
+                the instruction offset is the f_lasti of the render function
+                when it emitted the chunk and start and end are offsets into
+                the rendered text. Empty if the source was not rendered by
+                Jinja.
+            render: Renders the template again, returning the preprocessed
+                source, the rendered text, the code object of the render
+                function and the template debug info.
+            line_shifts: Line shifts recorded while preprocessing the template.
+        """
+        self.file_name = file_name
+        self._chunks = chunks
+        self._chunk_starts = chunks[0::4]
+        self._render = render
+        self._line_shifts = line_shifts
+        # Resolved on the first lookup; only error reporting needs them.
+        self._rendered_template: Optional[RenderedTemplate] = None
+        self._offsets: Optional[List[int]] = None
+        self._static: Optional[Set[str]] = None
+        self._template_text: Optional[str] = None
+        self._template_lines: List[str] = []
+        self._code_lines: List[int] = []
+        self._debug_code_lines: List[int] = []
+        self._debug_template_lines: List[int] = []
+
+    @property
+    def source(self) -> str:
+        """
+        The preprocessed template source.
+        """
+        return self._rendered().source
+
+    @property
+    def rendered(self) -> str:
+        """
+        The rendered YAML text.
+        """
+        return self._rendered().rendered
+
+    def _rendered(self) -> RenderedTemplate:
+        """
+        Render the template again on first use.
+        """
+        if self._rendered_template is None:
+            self._rendered_template = self._render()
+        return self._rendered_template
+
+    def template_line(self, rendered_line: int) -> int:
+        """
+        Find the template line that produced a rendered line.
+
+        Static template text is matched exactly; lines emitted by includes,
+        macros or multi-line expressions are attributed to the statement that
+        produced them.
+
+        Args:
+            rendered_line: The 0-based line in the rendered YAML.
+
+        Returns:
+            The 1-based line in the template file.
+        """
+        if not self._chunk_starts:
+            return original_line(self._line_shifts, rendered_line + 1)
+
+        # The first chunk starts the first line; any later chunk determines the
+        # lines after the one it starts on.
+        index = max(bisect_left(self._chunk_starts, rendered_line, 1) - 1, 0)
+
+        start_line, lasti, start, end = self._chunks[4 * index : 4 * index + 4]
+
+        line = self._statement_line(lasti)
+        chunk = self.rendered[start:end]
+        if chunk not in self._static_text():
+            # Output of includes, macros and expressions maps to the statement.
+            return original_line(self._line_shifts, line)
+
+        # Static text is usually found verbatim at or after its statement line.
+        text = self._text()
+        offset = self._line_offset(line)
+        found = text.find(chunk, offset)
+        if found >= 0:
+            line += text.count("\n", offset, found)
+            return original_line(self._line_shifts, line + rendered_line - start_line)
+        # Jinja also merges text around comments, raw blocks and constant
+        # expressions; follow the lines of such chunks through the template.
+        line = self._follow_lines(chunk, line, rendered_line - start_line)
+        return original_line(self._line_shifts, line)
+
+    def _follow_lines(self, chunk: str, line: int, index: int) -> int:
+        """
+        Find the template line of a line of an output chunk.
+
+        Each line of the chunk is matched with the first template line at or
+        after the line matched before it that contains it. Lines that match
+        nothing, such as blank lines or folded constant expressions, are taken
+        to be on the line following the previous match.
+
+        Args:
+            chunk: The output chunk.
+            line: The 1-based template line of the statement that emitted it.
+            index: The 0-based line of the chunk to locate.
+
+        Returns:
+            The 1-based template line.
+        """
+        lines = self._template_lines
+        for chunk_line in chunk.split("\n", index + 1)[: index + 1]:
+            if chunk_line.strip():
+                end = min(line + MAX_LINE_LOOKAHEAD, len(lines) + 1)
+                line = next(
+                    (i for i in range(line, end) if chunk_line in lines[i - 1]),
+                    line,
+                )
+            line += 1
+        return line - 1
+
+    def _statement_line(self, lasti: int) -> int:
+        """
+        Find the template line of an instruction of the render function.
+        """
+        if self._offsets is None:
+            self._resolve_line_tables()
+        index = bisect_right(self._offsets, lasti) - 1
+        code_line = self._code_lines[index] if index >= 0 else 0
+        index = bisect_right(self._debug_code_lines, code_line) - 1
+        return self._debug_template_lines[index] if index >= 0 else 1
+
+    def _resolve_line_tables(self) -> None:
+        """
+        Decode the render function's line table and the template debug info.
+        """
+        self._offsets = []
+        for offset, code_line in dis.findlinestarts(self._rendered().code):
+            if code_line is not None:
+                self._offsets.append(offset)
+                self._code_lines.append(code_line)
+        for pair in filter(None, self._rendered().debug_info.split("&")):
+            template_line, code_line = pair.split("=")
+            self._debug_template_lines.append(int(template_line))
+            self._debug_code_lines.append(int(code_line))
+
+    def _static_text(self) -> Set[str]:
+        """
+        Get the text constants the render function yields as static output.
+        """
+        if self._static is None:
+            code = self._rendered().code
+            self._static = {const for const in code.co_consts if isinstance(const, str)}
+        return self._static
+
+    def _text(self) -> str:
+        """
+        Get the template source with line breaks normalized as Jinja does.
+        """
+        if self._template_text is None:
+            self._template_text = NEWLINE_PATTERN.sub("\n", self.source)
+            self._template_lines = self._template_text.split("\n")
+        return self._template_text
+
+    def _line_offset(self, line: int) -> int:
+        """
+        Find the offset of a 1-based line in the normalized template source.
+        """
+        text = self._text()
+        offset = 0
+        for _ in range(line - 1):
+            offset = text.find("\n", offset) + 1
+            if offset == 0:
+                return len(text)
+        return offset
+
+    def describe(self, rendered_line: int) -> str:
+        """
+        Format the template location of a rendered line.
+
+        Args:
+            rendered_line: The 0-based line in the rendered YAML.
+
+        Returns:
+            The location as "file:line".
+        """
+        return f"{self.file_name}:{self.template_line(rendered_line)}"
+
+    def locate(self, path: Optional[Sequence[str]]) -> Optional[int]:
+        """
+        Find the template line of a value in the parsed data.
+
+        Args:
+            path: The path to the value as reported by fastjsonschema,
+                e.g. ["data", "servers", "0", "port"].
+
+        Returns:
+            The 1-based line in the template file, or None if the path cannot
+            be resolved.
+        """
+        if not path:
+            return None
+        try:
+            node = yaml.compose(self.rendered, Loader=SafeLoader)
+            for segment in path[1:]:
+                if isinstance(node, yaml.MappingNode):
+                    node = next(
+                        value for key, value in node.value if key.value == segment
+                    )
+                elif isinstance(node, yaml.SequenceNode):
+                    node = node.value[int(segment)]
+                else:
+                    return None
+        except (StopIteration, IndexError, ValueError, yaml.YAMLError) as e:
+            logger.debug(f"Could not locate {path} in {self.file_name}: {e}")
+            return None
+        if node is None:
+            return None
+        return self.template_line(node.start_mark.line)
@@ -0,0 +1,290 @@
+"""
+Memory stress harness for oot.loaders and oot.parser.
+
+The tests run on inputs up to twice the loader's code cache threshold; set
+OOT_STRESS_MAX_BYTES to grow them (up to 1 GB) and OOT_STRESS_TIME_BUDGET to
+bound the seconds spent. Wall-clock assertions only run with
+OOT_STRESS_TIMING=1, as they are unreliable on shared machines. Run the module
+directly to print a per-stage breakdown:
+
+    python -m tests.stress.test_memory 1073741824
+"""
+
+import gc
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import unittest
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from unittest.mock import patch
+
+import yaml
+
+from oot import parser
+from oot.loaders import CustomYAMLTemplateLoader
+
+MIN_BYTES = 1024
+# Include a size past the threshold above which compiled code is not cached.
+MAX_BYTES = int(
+    os.environ.get(
+        "OOT_STRESS_MAX_BYTES", 2 * CustomYAMLTemplateLoader.MAX_CACHED_SOURCE_LENGTH
+    )
+)
+# Seconds the harness may spend before skipping larger sizes.
+TIME_BUDGET = float(os.environ.get("OOT_STRESS_TIME_BUDGET", 600))
+TIMING = os.environ.get("OOT_STRESS_TIMING") == "1"
+
+# Peak traced memory per input byte, plus a fixed allowance.
+PLAIN_PEAK_BUDGET = 80
+JINJA_PEAK_BUDGET = 250
+FIXED_BUDGET = 2 * 1024 * 1024
+# Memory still alive when YAML parsing starts, per input byte.
+LIVE_BEFORE_PARSE_BUDGET = 2
+# Seconds per input byte for a full parse, plus a fixed allowance.
+SECONDS_PER_BYTE_BUDGET = 20 / 2**20
+FIXED_SECONDS_BUDGET = 1.0
+
+
+def sizes(max_bytes: int = MAX_BYTES) -> Iterator[int]:
+    """
+    Yield input sizes from MIN_BYTES to max_bytes, growing 8x per step.
+    """
+    size = MIN_BYTES
+    while size <= max_bytes:
+        yield size
+        size *= 8
+
+
+def generate_config(path: Path, size: int, jinja: bool = True) -> None:
+    """
+    Write a config of roughly `size` bytes with environment variables and,
+    optionally, Jinja expressions.
+    """
+    name = '"{{ prefix }}-%d"' if jinja else '"service-%d"'
+    entry = "  key%d:\n    name: " + name + "\n    port: ${PORT:8080}\n"
+    with open(path, "w") as f:
+        f.write("root:\n")
+        written, index = 6, 0
+        while written < size:
+            written += f.write(entry % (index, index))
+            index += 1
+
+
+def measure_stages(
+    file_path: Path, context: Optional[Dict[str, Any]] = None
+) -> Dict[str, Tuple[int, int]]:
+    """
+    Measure the traced memory of each stage of parse_yaml_with_jinja.
+
+    Stages end when the loader returns the root template source ("read") and
+    its compiled code ("compile"), when rendering returns ("render") and when
+    YAML parsing returns ("parse").
+
+    Returns:
+        Stage name -> (peak bytes during the stage, bytes alive after it),
+        both relative to the memory alive before the first stage.
+    """
+    stats: Dict[str, Tuple[int, int]] = {}
+
+    def ends_stage(stage: str, function: Callable) -> Callable:
+        def wrapper(*args, **kwargs):
+            result = function(*args, **kwargs)
+            if stage not in stats:
+                current, peak = tracemalloc.get_traced_memory()
+                stats[stage] = (peak - base, current - base)
+                tracemalloc.reset_peak()
+            return result
+
+        return wrapper
+
+    loader_class = CustomYAMLTemplateLoader
+    with patch.object(
+        loader_class, "get_source", ends_stage("read", loader_class.get_source)
+    ), patch.object(
+        loader_class, "compile", ends_stage("compile", loader_class.compile)
+    ), patch.object(
+        parser, "_render_file", ends_stage("render", parser._render_file)
+    ), patch.object(
+        parser.yaml, "load", ends_stage("parse", yaml.load)
+    ):
+        tracemalloc.start()
+        try:
+            base = tracemalloc.get_traced_memory()[0]
+            parser.parse_yaml_with_jinja(file_path, context)
+        finally:
+            tracemalloc.stop()
+    return stats
+
+
+def measure_pipeline(
+    file_path: Path, context: Optional[Dict[str, Any]] = None
+) -> Tuple[int, int]:
+    """
+    Measure parse_yaml_with_jinja end to end. The cyclic garbage collector is
+    disabled, so memory must be released by reference counting alone.
+
+    Returns:
+        The peak traced bytes and the bytes alive when YAML parsing starts.
+    """
+    live: List[int] = []
+    load = yaml.load
+
+    def traced_load(stream, Loader):
+        live.append(tracemalloc.get_traced_memory()[0])
+        return load(stream, Loader=Loader)
+
+    with patch("oot.parser.yaml.load", traced_load):
+        gc.collect()
+        gc.disable()
+        tracemalloc.start()
+        try:
+            base = tracemalloc.get_traced_memory()[0]
+            parser.parse_yaml_with_jinja(file_path, context)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+            gc.enable()
+    return peak - base, live[0] - base
+
+
+def measure_peak_rss(file_path: Path, context: Optional[Dict[str, Any]] = None) -> int:
+    """
+    Measure the peak RSS in bytes of a fresh process running parse_file.
+    """
+    # ru_maxrss survives fork and exec on Linux, so prefer the high-water mark
+    # of the fresh address space where procfs provides it.
+    script = (
+        "import json, resource, sys\n"
+        "from oot import parse_file\n"
+        "parse_file(sys.argv[1], json.loads(sys.argv[2]))\n"
+        "try:\n"
+        "    with open('/proc/self/status') as f:\n"
+        "        hwm = [l for l in f if l.startswith('VmHWM:')][0]\n"
+        "    print(int(hwm.split()[1]) * 1024)\n"
+        "except (OSError, IndexError):\n"
+        "    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss\n"
+        "    print(peak if sys.platform == 'darwin' else peak * 1024)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script, str(file_path), json.dumps(context or {})],
+        capture_output=True,
+        check=True,
+        cwd=Path(__file__).resolve().parents[2],
+        text=True,
+    )
+    return int(result.stdout.strip())
+
+
+class TestMemory(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.deadline = time.monotonic() + TIME_BUDGET
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.directory = Path(self.temp_dir.name)
+        self.context = {"prefix": "p"}
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def timed_sizes(self) -> Iterator[int]:
+        """
+        Yield the sizes to test until the harness runs out of time.
+        """
+        for size in sizes():
+            if time.monotonic() > self.deadline:
+                self.skipTest(f"time budget exhausted before {size} bytes")
+            yield size
+
+    def create_config(self, size, jinja=True):
+        file_path = self.directory / f"config_{size}_{jinja}.yaml"
+        generate_config(file_path, size, jinja)
+        return file_path
+
+    def test_plain_yaml_stays_within_budget(self):
+        for size in self.timed_sizes():
+            with self.subTest(size=size):
+                file_path = self.create_config(size, jinja=False)
+                stats = measure_stages(file_path, self.context)
+                self.assertNotIn("compile", stats)
+                peak = max(stage_peak for stage_peak, _ in stats.values())
+                self.assertLess(peak, PLAIN_PEAK_BUDGET * size + FIXED_BUDGET)
+
+    def test_jinja_yaml_stays_within_budget(self):
+        for size in self.timed_sizes():
+            with self.subTest(size=size):
+                file_path = self.create_config(size)
+                stats = measure_stages(file_path, self.context)
+                peak = max(stage_peak for stage_peak, _ in stats.values())
+                self.assertLess(peak, JINJA_PEAK_BUDGET * size + FIXED_BUDGET)
+
+    def test_intermediate_buffers_released_before_parsing(self):
+        for size in self.timed_sizes():
+            with self.subTest(size=size):
+                file_path = self.create_config(size)
+                _, live = measure_pipeline(file_path, self.context)
+                self.assertLess(live, LIVE_BEFORE_PARSE_BUDGET * size + FIXED_BUDGET)
+
+    @unittest.skipUnless(TIMING, "set OOT_STRESS_TIMING=1 to run timing checks")
+    def test_parse_time_scales_linearly(self):
+        for size in self.timed_sizes():
+            with self.subTest(size=size):
+                file_path = self.create_config(size)
+                started = time.perf_counter()
+                parser.parse_yaml_with_jinja(file_path, self.context)
+                elapsed = time.perf_counter() - started
+                self.assertLess(
+                    elapsed, SECONDS_PER_BYTE_BUDGET * size + FIXED_SECONDS_BUDGET
+                )
+
+    def test_large_templates_bypass_code_cache(self):
+        size = max(sizes())
+        if size <= CustomYAMLTemplateLoader.MAX_CACHED_SOURCE_LENGTH:
+            self.skipTest("OOT_STRESS_MAX_BYTES is below the code cache threshold")
+        cache = CustomYAMLTemplateLoader._code_cache
+        cached = len(cache)
+        parser.parse_yaml_with_jinja(self.create_config(size), self.context)
+        self.assertEqual(len(cache), cached)
+
+    @unittest.skipIf(sys.platform == "win32", "resource is not available")
+    def test_peak_rss(self):
+        size = max(sizes())
+        file_path = self.create_config(size)
+        peak_rss = measure_peak_rss(file_path, self.context)
+        self.assertLess(peak_rss, JINJA_PEAK_BUDGET * size + 256 * 1024 * 1024)
+
+
+def main(max_bytes: int) -> None:
+    """
+    Print the per-stage memory breakdown for growing inputs, stopping at the
+    first size started after TIME_BUDGET seconds.
+    """
+    deadline = time.monotonic() + TIME_BUDGET
+    with tempfile.TemporaryDirectory() as directory:
+        for jinja in (False, True):
+            for size in sizes(max_bytes):
+                if time.monotonic() > deadline:
+                    print(f"time budget exhausted before {size / 2**20:.3f}MB")
+                    return
+                file_path = Path(directory) / "config.yaml"
+                generate_config(file_path, size, jinja)
+                stats = measure_stages(file_path, {"prefix": "p"})
+                breakdown = "  ".join(
+                    f"{stage}={peak / 2**20:.1f}MB"
+                    for stage, (peak, _) in stats.items()
+                )
+                rss = measure_peak_rss(file_path, {"prefix": "p"})
+                print(
+                    f"{'jinja' if jinja else 'plain'} {size / 2**20:10.3f}MB  "
+                    f"{breakdown}  rss={rss / 2**20:.1f}MB"
+                )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else MAX_BYTES)
@@ -0,0 +1,107 @@
+"""
+Throughput benchmark for oot.RenderPool.
+
+The throughput assertion compares wall-clock rates and only runs with
+OOT_STRESS_TIMING=1. Run the module directly to print requests per second for
+1 to N workers:
+
+    python -m tests.stress.test_render_pool 200
+"""
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from oot.main import parse_file
+from oot.render_pool import RenderPool
+
+TEMPLATE = (
+    "services:\n"
+    "{% for i in range(count) %}"
+    "  service{{ i }}:\n"
+    "    name: {{ prefix }}-{{ i }}\n"
+    "    port: {{ 8000 + i }}\n"
+    "    replicas: ${REPLICAS:2}\n"
+    "{% endfor %}"
+)
+CONTEXT = {"prefix": "svc", "count": 200}
+
+
+def available_cpus() -> int:
+    """
+    Count the CPUs this process may run on.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def benchmark(file_path: Path, workers: int, requests: int) -> float:
+    """
+    Measure the requests per second of a warm pool parsing a file.
+    """
+    with RenderPool(workers=workers) as pool:
+        for future in [pool.submit(file_path, CONTEXT) for _ in range(workers)]:
+            future.result()
+
+        started = time.perf_counter()
+        futures = [pool.submit(file_path, CONTEXT) for _ in range(requests)]
+        for future in futures:
+            future.result()
+        return requests / (time.perf_counter() - started)
+
+
+def benchmark_in_process(file_path: Path, requests: int) -> float:
+    """
+    Measure the requests per second of parse_file in the calling process.
+    """
+    started = time.perf_counter()
+    for _ in range(requests):
+        parse_file(file_path, CONTEXT)
+    return requests / (time.perf_counter() - started)
+
+
+class TestRenderPoolThroughput(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file_path = Path(self.temp_dir.name) / "config.yaml"
+        self.file_path.write_text(TEMPLATE)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    @unittest.skipUnless(
+        os.environ.get("OOT_STRESS_TIMING") == "1",
+        "set OOT_STRESS_TIMING=1 to run timing checks",
+    )
+    def test_throughput_scales_with_workers(self):
+        # Two workers can only outpace one when two CPUs are available; on a
+        # single CPU they must at least not lose throughput to contention.
+        cpus = min(available_cpus(), 2)
+        single = benchmark(self.file_path, workers=1, requests=40)
+        double = benchmark(self.file_path, workers=2, requests=80)
+        self.assertGreater(double, 0.65 * cpus * single)
+
+
+def main(requests: int) -> None:
+    """
+    Print the throughput for an increasing number of workers.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = Path(directory) / "config.yaml"
+        file_path.write_text(TEMPLATE)
+        baseline = benchmark_in_process(file_path, requests)
+        print(f"in-process  {baseline:8.1f} req/s")
+        for workers in range(1, available_cpus() + 1):
+            throughput = benchmark(file_path, workers, requests)
+            print(
+                f"{workers:2d} workers  {throughput:8.1f} req/s  "
+                f"({throughput / baseline:.2f}x in-process)"
+            )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,51 @@
+import unittest
+
+from oot.cache import LRUCache
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_get_missing_key(self):
+        self.assertIsNone(LRUCache(2).get("missing"))
+
+    def test_put_and_get(self):
+        cache = LRUCache(2)
+        cache.put("a", 1)
+        self.assertEqual(cache.get("a"), 1)
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual((cache.get("a"), cache.get("c")), (1, 3))
+        self.assertEqual(len(cache), 2)
+
+    def test_clear(self):
+        cache = LRUCache(2)
+        cache.put("a", 1)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+    def test_evicts_beyond_max_weight(self):
+        cache = LRUCache(10, max_weight=5)
+        cache.put("a", 1, weight=2)
+        cache.put("b", 2, weight=2)
+        cache.put("c", 3, weight=3)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual((cache.get("b"), cache.get("c")), (2, 3))
+
+    def test_does_not_cache_value_heavier_than_max_weight(self):
+        cache = LRUCache(10, max_weight=5)
+        cache.put("a", 1, weight=2)
+        cache.put("b", 2, weight=6)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+
+    def test_replacing_value_updates_weight(self):
+        cache = LRUCache(10, max_weight=5)
+        cache.put("a", 1, weight=4)
+        cache.put("a", 2, weight=1)
+        cache.put("b", 3, weight=4)
+        self.assertEqual((cache.get("a"), cache.get("b")), (2, 3))
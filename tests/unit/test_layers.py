@@ -0,0 +1,163 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from oot.layers import (
+    clear_layer_cache,
+    configure_layer_cache,
+    deep_merge,
+    parse_layers,
+)
+from oot.m_exceptions import ValidationError
+from oot.parser import parse_yaml_with_jinja
+
+
+class TestDeepMerge(unittest.TestCase):
+    def test_merge_nested_mappings(self):
+        base = {"a": 1, "nested": {"b": 2, "c": 3}}
+        override = {"nested": {"c": 4, "d": 5}, "e": 6}
+        result = deep_merge(base, override)
+        self.assertEqual(result, {"a": 1, "nested": {"b": 2, "c": 4, "d": 5}, "e": 6})
+        self.assertEqual(base, {"a": 1, "nested": {"b": 2, "c": 3}})
+
+    def test_override_scalar_with_mapping(self):
+        self.assertEqual(deep_merge({"a": 1}, {"a": {"b": 2}}), {"a": {"b": 2}})
+
+    def test_list_strategies(self):
+        base, override = {"l": [1, 2]}, {"l": [2, 3]}
+        self.assertEqual(deep_merge(base, override, "replace"), {"l": [2, 3]})
+        self.assertEqual(deep_merge(base, override, "append"), {"l": [1, 2, 2, 3]})
+        self.assertEqual(deep_merge(base, override, "prepend"), {"l": [2, 3, 1, 2]})
+        self.assertEqual(deep_merge(base, override, "unique"), {"l": [1, 2, 3]})
+
+
+class TestParseLayers(unittest.TestCase):
+    def setUp(self):
+        clear_layer_cache()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.directory = Path(self.temp_dir.name)
+        self.base = self.create_yaml_file(
+            "base.yaml", "name: {{ name }}\nreplicas: 1\nports: [80]\n"
+        )
+        self.prod = self.create_yaml_file("prod.yaml", "replicas: 3\nports: [443]\n")
+        self.eu = self.create_yaml_file("eu.yaml", "region: eu\n")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+        configure_layer_cache()
+
+    def create_yaml_file(self, name, content):
+        file_path = self.directory / name
+        file_path.write_text(content)
+        return file_path
+
+    def test_parse_layers(self):
+        result = parse_layers([self.base, self.prod, self.eu], {"name": "svc"})
+        self.assertEqual(
+            result, {"name": "svc", "replicas": 3, "ports": [443], "region": "eu"}
+        )
+
+    def test_parse_layers_with_list_strategy(self):
+        result = parse_layers(
+            [self.base, self.prod], {"name": "svc"}, list_strategy="append"
+        )
+        self.assertEqual(result["ports"], [80, 443])
+
+    def test_parse_layers_reuses_cached_prefix(self):
+        with patch(
+            "oot.layers.parse_yaml_with_jinja", wraps=parse_yaml_with_jinja
+        ) as mock_parse:
+            parse_layers([self.base, self.prod], {"name": "svc"})
+            parse_layers([self.base, self.prod, self.eu], {"name": "svc"})
+            parse_layers([self.base, self.eu], {"name": "svc"})
+        parsed = [call.args[0] for call in mock_parse.call_args_list]
+        self.assertEqual(parsed, [self.base, self.prod, self.eu])
+
+    def test_parse_layers_reparses_changed_layer(self):
+        parse_layers([self.base, self.prod], {"name": "svc"})
+        self.prod.write_text("replicas: 5\n")
+        result = parse_layers([self.base, self.prod], {"name": "svc"})
+        self.assertEqual(result["replicas"], 5)
+
+    def test_parse_layers_context_is_part_of_cache_key(self):
+        first = parse_layers([self.base], {"name": "one"})
+        second = parse_layers([self.base], {"name": "two"})
+        self.assertEqual((first["name"], second["name"]), ("one", "two"))
+
+    def test_parse_layers_environment_is_part_of_cache_key(self):
+        env_layer = self.create_yaml_file("env.yaml", "value: ${LAYER_VAR:none}\n")
+        self.addCleanup(lambda: os.environ.pop("LAYER_VAR", None))
+        os.environ["LAYER_VAR"] = "first"
+        self.assertEqual(parse_layers([env_layer])["value"], "first")
+        os.environ["LAYER_VAR"] = "second"
+        self.assertEqual(parse_layers([env_layer])["value"], "second")
+
+    def test_parse_layers_result_is_private_copy(self):
+        result = parse_layers([self.base, self.prod], {"name": "svc"})
+        result["ports"].append(8080)
+        result = parse_layers([self.base, self.prod], {"name": "svc"})
+        self.assertEqual(result["ports"], [443])
+
+    def test_parse_layers_validates_merged_data(self):
+        schema_path = self.create_yaml_file(
+            "schema.json",
+            '{"type": "object", "required": ["region"],'
+            ' "properties": {"replicas": {"type": "integer"}}}',
+        )
+        result = parse_layers(
+            [self.base, self.prod, self.eu],
+            {"name": "svc"},
+            validation_schema=schema_path,
+        )
+        self.assertEqual(result["region"], "eu")
+        with self.assertRaises(ValidationError):
+            parse_layers(
+                [self.base, self.prod], {"name": "svc"}, validation_schema=schema_path
+            )
+
+    def test_parse_layers_validation_error_keeps_path(self):
+        schema_path = self.create_yaml_file(
+            "schema.json",
+            '{"type": "object", "properties": {"replicas": {"type": "string"}}}',
+        )
+        with self.assertRaises(ValidationError) as context:
+            parse_layers(
+                [self.base, self.prod], {"name": "svc"}, validation_schema=schema_path
+            )
+        self.assertEqual(context.exception.path, ["data", "replicas"])
+
+    def test_parse_layers_cache_can_be_disabled(self):
+        configure_layer_cache(max_entries=0)
+        with patch(
+            "oot.layers.parse_yaml_with_jinja", wraps=parse_yaml_with_jinja
+        ) as mock_parse:
+            parse_layers([self.base], {"name": "svc"})
+            result = parse_layers([self.base], {"name": "svc"})
+        self.assertEqual(mock_parse.call_count, 2)
+        self.assertEqual(result["name"], "svc")
+
+    def test_parse_layers_cache_is_bounded_by_size(self):
+        configure_layer_cache(max_bytes=self.prod.stat().st_size)
+        with patch(
+            "oot.layers.parse_yaml_with_jinja", wraps=parse_yaml_with_jinja
+        ) as mock_parse:
+            parse_layers([self.base], {"name": "svc"})
+            parse_layers([self.base], {"name": "svc"})
+            parse_layers([self.prod])
+            parse_layers([self.prod])
+        parsed = [call.args[0] for call in mock_parse.call_args_list]
+        self.assertEqual(parsed, [self.base, self.base, self.prod])
+
+    def test_parse_layers_invalid_list_strategy(self):
+        with self.assertRaises(ValueError):
+            parse_layers([self.base], list_strategy="zip")
+
+    def test_parse_layers_no_files(self):
+        with self.assertRaises(ValueError):
+            parse_layers([])
+
+    def test_parse_layers_missing_file(self):
+        with self.assertRaises(FileNotFoundError):
+            parse_layers([self.base, self.directory / "missing.yaml"])
@@ -4,6 +4,7 @@ import unittest
 from pathlib import Path
 from unittest.mock import mock_open, patch
 
+from jinja2 import BytecodeCache, Environment
 from jinja2.exceptions import TemplateNotFound
 
 from oot.loaders import CustomYAMLTemplateLoader
@@ -99,3 +100,141 @@ class TestCustomYAMLTemplateLoader(unittest.TestCase):
         yaml_content = "${var1}"
         preprocessed = loader.preprocess_yaml(yaml_content)
         self.assertEqual(preprocessed, "")
+
+    def test_get_source_records_multiline_env_var_shifts(self):
+        loader = CustomYAMLTemplateLoader(str(self.template_dir))
+        os.environ["var1"] = "a\nb\nc"
+        self.addCleanup(lambda: os.environ.pop("var1", None))
+        template_file = self.template_dir / "multiline.yaml"
+        template_file.write_text("first: 1\nkey: ${var1}")
+        loader.get_source(None, "multiline.yaml")
+        self.assertEqual(loader.line_shifts["multiline.yaml"], [(2, 2)])
+
+    def test_get_source_no_shifts_for_single_line_env_var(self):
+        loader = CustomYAMLTemplateLoader(str(self.template_dir))
+        template_file = self.template_dir / "single.yaml"
+        template_file.write_text("key: ${var1:default}")
+        loader.get_source(None, "single.yaml")
+        self.assertNotIn("single.yaml", loader.line_shifts)
+
+    def test_get_source_reuses_env_plan_of_unchanged_file(self):
+        template_file = self.template_dir / "plan.yaml"
+        template_file.write_text("a: ${PLAN_VAR:x}\nb: 1")
+        CustomYAMLTemplateLoader(str(self.template_dir)).get_source(None, "plan.yaml")
+
+        loader = CustomYAMLTemplateLoader(str(self.template_dir))
+        with patch.dict(os.environ, {"PLAN_VAR": "y\nz"}), patch(
+            "builtins.open", side_effect=AssertionError("file read again")
+        ):
+            source, _, _ = loader.get_source(None, "plan.yaml")
+        self.assertEqual(source, "a: y\nz\nb: 1")
+        self.assertEqual(loader.line_shifts["plan.yaml"], [(1, 1)])
+
+        template_file.write_text("a: ${PLAN_VAR:x}\nb: 22")
+        source, _, _ = loader.get_source(None, "plan.yaml")
+        self.assertEqual(source, "a: x\nb: 22")
+
+    def test_prefetch_loads_referenced_templates(self):
+        (self.template_dir / "root.yaml").write_text(
+            '{% include "a.yaml" %}\n{% import "b.yaml" as b %}'
+        )
+        (self.template_dir / "a.yaml").write_text('{% include "c.yaml" %}')
+        (self.template_dir / "b.yaml").write_text("b: 1")
+        (self.template_dir / "c.yaml").write_text("c: 1")
+        loader = CustomYAMLTemplateLoader(str(self.template_dir))
+        loader.prefetch(Environment(), "root.yaml")
+        self.assertEqual(
+            set(loader._prefetched), {"root.yaml", "a.yaml", "b.yaml", "c.yaml"}
+        )
+
+    def test_get_source_uses_prefetched_template(self):
+        template_file = self.template_dir / "root.yaml"
+        template_file.write_text("key: value")
+        loader = CustomYAMLTemplateLoader(str(self.template_dir))
+        loader.prefetch(Environment(), "root.yaml")
+        with patch("builtins.open", mock_open(read_data="changed")) as mocked:
+            source, filename, _ = loader.get_source(None, "root.yaml")
+        mocked.assert_not_called()
+        self.assertEqual(source, "key: value")
+        self.assertEqual(filename, str(template_file))
+
+    def test_prefetch_uses_dependency_index_in_one_round(self):
+        (self.template_dir / "root.yaml").write_text('{% include "a.yaml" %}')
+        (self.template_dir / "a.yaml").write_text('{% include "b.yaml" %}')
+        (self.template_dir / "b.yaml").write_text("b: 1")
+        CustomYAMLTemplateLoader(str(self.template_dir)).prefetch(
+            Environment(), "root.yaml"
+        )
+
+        loader = CustomYAMLTemplateLoader(str(self.template_dir))
+        with patch.object(
+            loader, "_load_many", wraps=loader._load_many
+        ) as mock_load_many:
+            loader.prefetch(Environment(), "root.yaml")
+        mock_load_many.assert_called_once_with(["a.yaml", "b.yaml", "root.yaml"])
+
+    def test_prefetch_skips_missing_templates(self):
+        (self.template_dir / "root.yaml").write_text('{% include "missing.yaml" %}')
+        loader = CustomYAMLTemplateLoader(str(self.template_dir))
+        loader.prefetch(Environment(), "root.yaml")
+        self.assertEqual(set(loader._prefetched), {"root.yaml"})
+        with self.assertRaises(TemplateNotFoundError):
+            loader.get_source(None, "missing.yaml")
+
+    @patch("oot.m_exceptions.logger")
+    def test_prefetch_does_not_log_missing_templates(self, mock_logger):
+        (self.template_dir / "root.yaml").write_text(
+            "{% if false %}{% include 'nope.yaml' %}{% endif %}"
+        )
+        loader = CustomYAMLTemplateLoader(str(self.template_dir))
+        loader.prefetch(Environment(), "root.yaml")
+        mock_logger.error.assert_not_called()
+
+    def test_compile_reuses_code_for_unchanged_source(self):
+        env = Environment()
+        first = CustomYAMLTemplateLoader(str(self.template_dir))
+        second = CustomYAMLTemplateLoader(str(self.template_dir))
+        code = first.compile(env, "a.yaml", "key: {{ v }}", "/tmp/a.yaml")
+        self.assertIs(
+            second.compile(env, "a.yaml", "key: {{ v }}", "/tmp/a.yaml"), code
+        )
+        self.assertIsNot(
+            second.compile(env, "a.yaml", "key: {{ w }}", "/tmp/a.yaml"), code
+        )
+
+    def test_compile_keys_code_on_environment_settings(self):
+        loader = CustomYAMLTemplateLoader(str(self.template_dir))
+        source = "{% if true %}\nx: 1\n{% endif %}"
+        loader.compile(Environment(), "t.yaml", source, "/tmp/t.yaml")
+        env = Environment(trim_blocks=True)
+        code = loader.compile(env, "t.yaml", source, "/tmp/t.yaml")
+        template = env.template_class.from_code(env, code, env.make_globals(None))
+        self.assertEqual(template.render(), "x: 1\n")
+
+    def test_load_compiles_template(self):
+        (self.template_dir / "root.yaml").write_text("key: {{ v }}")
+        loader = CustomYAMLTemplateLoader(str(self.template_dir))
+        template = loader.load(Environment(loader=loader), "root.yaml")
+        self.assertEqual(template.render(v="value"), "key: value")
+
+    def test_load_uses_bytecode_cache(self):
+        (self.template_dir / "root.yaml").write_text("key: {{ v }}")
+        loader = CustomYAMLTemplateLoader(str(self.template_dir))
+        cache = DictBytecodeCache()
+        env = Environment(loader=loader, bytecode_cache=cache)
+        loader.load(env, "root.yaml")
+        self.assertEqual(len(cache.buckets), 1)
+        template = loader.load(env, "root.yaml", {"v": "global"})
+        self.assertEqual(template.render(), "key: global")
+
+
+class DictBytecodeCache(BytecodeCache):
+    def __init__(self):
+        self.buckets = {}
+
+    def load_bytecode(self, bucket):
+        if bucket.key in self.buckets:
+            bucket.bytecode_from_string(self.buckets[bucket.key])
+
+    def dump_bytecode(self, bucket):
+        self.buckets[bucket.key] = bucket.bytecode_to_string()
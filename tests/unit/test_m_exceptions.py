@@ -1,3 +1,4 @@
+import pickle
 import unittest
 from unittest.mock import patch
 
@@ -29,3 +30,17 @@ class TestMExceptions(unittest.TestCase):
 
         self.assertEqual(str(cm.exception), "Error during validation")
         self.assertTrue(mock_logger.error.called)
+
+    def test_unpickling_does_not_log_again(self):
+        errors = [
+            TemplateNotFoundError("template.yaml"),
+            YAMLParseError("Error during YAML parsing", file_name="a.yaml", line=3),
+            ValidationError("Error during validation", path=["data", "a"], line=2),
+        ]
+        with patch("oot.m_exceptions.logger") as mock_logger:
+            restored = [pickle.loads(pickle.dumps(error)) for error in errors]
+        mock_logger.error.assert_not_called()
+        for error, copy in zip(errors, restored):
+            self.assertIs(type(copy), type(error))
+            self.assertEqual(str(copy), str(error))
+            self.assertEqual(copy.__dict__, error.__dict__)
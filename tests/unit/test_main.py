@@ -95,6 +95,31 @@ class TestParseFile(unittest.TestCase):
         with self.assertRaises(ValidationError):
             parse_file(file_path, validation_schema=schema_path)
 
+    def test_validation_error_reports_template_line(self):
+        file_path = self.create_yaml_file("name: test\nport: {{ port }}")
+        schema_path = self.create_yaml_file(
+            '{"type": "object", "properties": {"port": {"type": "string"}}}'
+        )
+        with self.assertRaises(ValidationError) as cm:
+            parse_file(file_path, context={"port": 80}, validation_schema=schema_path)
+        self.assertEqual(cm.exception.line, 2)
+        self.assertEqual(cm.exception.path, ["data", "port"])
+
+    @patch.dict(os.environ, {"PORT": "8080"})
+    def test_parsing_with_coercion(self):
+        file_path = self.create_yaml_file("port: ${PORT}\ndebug: {{ debug }}")
+        schema_path = self.create_yaml_file(
+            '{"type": "object", "properties": {"port": {"type": "string"},'
+            ' "debug": {"type": "boolean"}, "retries": {"default": 3}}}'
+        )
+        result = parse_file(
+            file_path,
+            context={"debug": "on"},
+            validation_schema=schema_path,
+            coerce=True,
+        )
+        self.assertEqual(result, {"port": "8080", "debug": True, "retries": 3})
+
     def test_return_empty_dict_if_yaml_is_none(self):
         file_path = self.create_yaml_file("")
         result = parse_file(file_path)
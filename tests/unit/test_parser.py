@@ -1,10 +1,13 @@
 import os
 import tempfile
+import time
 import unittest
 from pathlib import Path
 
+from jinja2 import Environment
+
 from oot.m_exceptions import YAMLParseError
-from oot.parser import parse_yaml_with_jinja
+from oot.parser import _render_with_source_map, parse_yaml_with_jinja
 
 
 class TestParseYAMLWithJinja(unittest.TestCase):
@@ -24,11 +27,100 @@ class TestParseYAMLWithJinja(unittest.TestCase):
         result = parse_yaml_with_jinja(file_path, {"var": "value"})
         self.assertEqual(result, {"key": "value"})
 
+    def test_yaml_with_includes_and_imports(self):
+        directory = Path(self.temp_dir.name)
+        (directory / "macros.yaml").write_text(
+            "{% macro entry(name) %}{{ name }}: {{ name | upper }}{% endmacro %}"
+        )
+        (directory / "child.yaml").write_text("child: ${CHILD_VAR:child_default}")
+        file_path = directory / "root.yaml"
+        file_path.write_text(
+            '{% import "macros.yaml" as m %}\n'
+            "{{ m.entry('a') }}\n"
+            '{% include "child.yaml" %}\n'
+        )
+        result = parse_yaml_with_jinja(file_path)
+        self.assertEqual(result, {"a": "A", "child": "child_default"})
+
     def test_invalid_yaml(self):
         file_path = self.create_yaml_file("key: value\nkey2")
         with self.assertRaises(YAMLParseError):
             parse_yaml_with_jinja(file_path)
 
+    def test_invalid_yaml_reports_template_line(self):
+        file_path = self.create_yaml_file(
+            "a: 1\n{% for i in items %}\nk{{ i }}: {{ i }}\n{% endfor %}\nb: [\n"
+        )
+        with self.assertRaises(YAMLParseError) as cm:
+            parse_yaml_with_jinja(file_path, {"items": [1, 2]})
+        self.assertEqual(cm.exception.line, 5)
+        self.assertIn(f"{file_path}:5", str(cm.exception))
+
+    def test_invalid_yaml_after_merged_static_text_reports_its_line(self):
+        cases = {
+            "comment": "a: 1\nb: 2\n{# note #}\nc: 3\nd: 4\ne: : bad\n",
+            "constant": "name: {{ 'svc' }}\nb: 2\nc: 3\nd: 4\ne: : bad\n",
+            "raw": "{% raw %}\nx: '{{ y }}'\n{% endraw %}\nd: 4\ne: : bad\n",
+            "crlf": "a: {{ 1 }}\r\nb: 2\r\nc: 3\r\nd: 4\r\ne: : bad\r\n",
+        }
+        for name, content in cases.items():
+            with self.subTest(name):
+                file_path = Path(self.temp_dir.name) / f"{name}.yaml"
+                file_path.write_bytes(content.encode())
+                with self.assertRaises(YAMLParseError) as cm:
+                    parse_yaml_with_jinja(file_path)
+                line = content.splitlines().index("e: : bad") + 1
+                self.assertEqual(cm.exception.line, line)
+
+    def test_invalid_yaml_in_include_reports_include_line(self):
+        directory = Path(self.temp_dir.name)
+        (directory / "included.yaml").write_text("x: 1\ny: a: b\n")
+        file_path = directory / "root.yaml"
+        file_path.write_text("a: 1\n{% include 'included.yaml' %}\nb: 2\n")
+        with self.assertRaises(YAMLParseError) as cm:
+            parse_yaml_with_jinja(file_path)
+        self.assertEqual(cm.exception.line, 2)
+
+    def test_invalid_yaml_in_macro_reports_call_line(self):
+        file_path = self.create_yaml_file(
+            "{% macro entry(key) %}\n"
+            "{{ key }}: 1\n"
+            "bad: a: b\n"
+            "{% endmacro %}\n"
+            "a: 1\n"
+            "{{ entry('b') }}\n"
+            "c: 3\n"
+        )
+        with self.assertRaises(YAMLParseError) as cm:
+            parse_yaml_with_jinja(file_path)
+        self.assertEqual(cm.exception.line, 6)
+
+    @unittest.skipUnless(
+        os.environ.get("OOT_STRESS_TIMING") == "1",
+        "set OOT_STRESS_TIMING=1 to run timing checks",
+    )
+    def test_render_time_scales_linearly(self):
+        def render_time(lines):
+            source = "".join(f"k{i}: {{{{ v }}}}\n" for i in range(lines))
+            template = Environment().from_string(source)
+            started = time.perf_counter()
+            _render_with_source_map(template, {"v": 1})
+            return time.perf_counter() - started
+
+        render_time(1000)
+        small = min(render_time(2000) for _ in range(3))
+        large = min(render_time(16000) for _ in range(3))
+        # 8x the lines; a quadratic render would take about 64x as long.
+        self.assertLess(large, 24 * small)
+
+    def test_invalid_yaml_line_after_multiline_env_var(self):
+        os.environ["MULTILINE"] = "|\n  x\n  y"
+        self.addCleanup(lambda: os.environ.pop("MULTILINE", None))
+        file_path = self.create_yaml_file("a: ${MULTILINE}\nb: [\n")
+        with self.assertRaises(YAMLParseError) as cm:
+            parse_yaml_with_jinja(file_path)
+        self.assertEqual(cm.exception.line, 2)
+
     def test_invalid_jinja_syntax(self):
         file_path = self.create_yaml_file("key: {{ var ")
         with self.assertRaises(YAMLParseError):
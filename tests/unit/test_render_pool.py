@@ -0,0 +1,91 @@
+import json
+import os
+import pickle
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from oot.m_exceptions import TemplateNotFoundError, ValidationError, YAMLParseError
+from oot.main import parse_file
+from oot.render_pool import RenderPool
+
+
+class TestRenderPool(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = RenderPool(workers=2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.close()
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.directory = Path(self.temp_dir.name)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def create_file(self, name, content):
+        file_path = self.directory / name
+        file_path.write_text(content)
+        return file_path
+
+    def test_parse_file_matches_in_process(self):
+        file_path = self.create_file(
+            "config.yaml",
+            "name: {{ name }}\nitems:\n{% for i in range(3) %}  - {{ i }}\n{% endfor %}",
+        )
+        context = {"name": "svc"}
+        self.assertEqual(
+            self.pool.parse_file(file_path, context), parse_file(file_path, context)
+        )
+
+    def test_parse_file_with_validation_and_coercion(self):
+        file_path = self.create_file("config.yaml", "port: '{{ port }}'")
+        schema_path = self.create_file(
+            "schema.json",
+            json.dumps({"type": "object", "properties": {"port": {"type": "integer"}}}),
+        )
+        result = self.pool.parse_file(
+            file_path, {"port": 80}, validation_schema=schema_path, coerce=True
+        )
+        self.assertEqual(result, {"port": 80})
+        with self.assertRaises(ValidationError):
+            self.pool.parse_file(file_path, {"port": 80}, validation_schema=schema_path)
+
+    def test_submit_concurrent_requests(self):
+        file_path = self.create_file("config.yaml", "value: {{ value }}")
+        futures = [self.pool.submit(file_path, {"value": i}) for i in range(10)]
+        self.assertEqual(
+            [f.result() for f in futures], [{"value": i} for i in range(10)]
+        )
+
+    def test_parse_layers(self):
+        base = self.create_file("base.yaml", "a: 1\nb: {c: 2}")
+        override = self.create_file("prod.yaml", "b: {d: 3}")
+        self.assertEqual(
+            self.pool.parse_layers([base, override]), {"a": 1, "b": {"c": 2, "d": 3}}
+        )
+
+    def test_errors_propagate_with_details(self):
+        file_path = self.create_file("config.yaml", "a: 1\nb: [\n")
+        with self.assertRaises(YAMLParseError) as cm:
+            self.pool.parse_file(file_path)
+        self.assertEqual(cm.exception.line, 2)
+
+        with self.assertRaises(FileNotFoundError):
+            self.pool.parse_file(self.directory / "missing.yaml")
+
+    def test_template_not_found_error_pickles(self):
+        error = pickle.loads(pickle.dumps(TemplateNotFoundError("a.yaml")))
+        self.assertEqual(error.template_name, "a.yaml")
+        self.assertEqual(str(error), "Template not found: a.yaml")
+
+    def test_workers_resolve_environment_at_creation(self):
+        file_path = self.create_file("config.yaml", "value: ${POOL_VALUE}")
+        with patch.dict(os.environ, {"POOL_VALUE": "created"}):
+            with RenderPool(workers=1) as pool:
+                os.environ["POOL_VALUE"] = "changed"
+                self.assertEqual(pool.parse_file(file_path), {"value": "created"})
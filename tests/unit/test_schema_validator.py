@@ -6,7 +6,7 @@ from tempfile import TemporaryDirectory
 from jsonschema import ValidationError as JsonSchemaValidationError
 
 from oot.m_exceptions import ValidationError
-from oot.schema_validator import SchemaValidator
+from oot.schema_validator import SchemaValidator, get_validator
 
 
 class TestSchemaValidator(unittest.TestCase):
@@ -106,5 +106,190 @@ class TestSchemaValidator(unittest.TestCase):
             validator.validate({"names": ["test", 123]})
         validator.validate({"names": ["test", "user"]})
 
+    def create_schema_file(self, schema):
+        schema_file = self.temp_dir.name + "/schema.json"
+        with open(schema_file, "w") as f:
+            json.dump(schema, f)
+        return schema_file
+
+    def test_validate_fills_defaults(self):
+        schema_file = self.create_schema_file(
+            {
+                "type": "object",
+                "properties": {"port": {"type": "integer", "default": 8080}},
+            }
+        )
+        validator = SchemaValidator(schema_file)
+        self.assertEqual(validator.validate({}, coerce=True), {"port": 8080})
+
+    def test_validate_without_coerce_leaves_data_untouched(self):
+        schema_file = self.create_schema_file(
+            {
+                "type": "object",
+                "properties": {"port": {"type": "integer", "default": 8080}},
+            }
+        )
+        validator = SchemaValidator(schema_file)
+        data = {}
+        self.assertEqual(validator.validate(data), {})
+        self.assertEqual(data, {})
+
+    def test_validate_without_coerce_rejects_mismatched_types(self):
+        schema_file = self.create_schema_file(
+            {"type": "object", "properties": {"port": {"type": "integer"}}}
+        )
+        validator = SchemaValidator(schema_file)
+        with self.assertRaises(ValidationError) as cm:
+            validator.validate({"port": "8080"})
+        self.assertEqual(cm.exception.path, ["data", "port"])
+
+    def test_validate_with_coerce_converts_scalars(self):
+        schema_file = self.create_schema_file(
+            {
+                "type": "object",
+                "properties": {
+                    "port": {"type": "integer"},
+                    "ratio": {"type": "number"},
+                    "debug": {"type": "boolean"},
+                    "name": {"type": "string"},
+                    "version": {"type": "string"},
+                    "owner": {"type": "null"},
+                    "retries": {"type": "integer", "default": 3},
+                },
+            }
+        )
+        validator = SchemaValidator(schema_file)
+        data = {
+            "port": "8080",
+            "ratio": "0.5",
+            "debug": "yes",
+            "name": 123,
+            "version": 1.0,
+            "owner": "",
+        }
+        result = validator.validate(data, coerce=True)
+        self.assertEqual(
+            result,
+            {
+                "port": 8080,
+                "ratio": 0.5,
+                "debug": True,
+                "name": "123",
+                "version": "1.0",
+                "owner": None,
+                "retries": 3,
+            },
+        )
+
+    def test_validate_with_coerce_nested_data(self):
+        schema_file = self.create_schema_file(
+            {
+                "type": "object",
+                "properties": {
+                    "servers": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {"port": {"type": "integer"}},
+                        },
+                    },
+                    "labels": {
+                        "type": "object",
+                        "additionalProperties": {"type": "string"},
+                    },
+                },
+            }
+        )
+        validator = SchemaValidator(schema_file)
+        result = validator.validate(
+            {"servers": [{"port": "80"}, {"port": 443}], "labels": {"tier": 1}},
+            coerce=True,
+        )
+        self.assertEqual(
+            result,
+            {"servers": [{"port": 80}, {"port": 443}], "labels": {"tier": "1"}},
+        )
+
+    def test_validate_with_coerce_keeps_values_matching_a_branch(self):
+        schema_file = self.create_schema_file(
+            {
+                "type": "object",
+                "properties": {
+                    "a": {"anyOf": [{"type": "integer"}, {"type": "string"}]},
+                    "b": {"type": "integer"},
+                    "c": {"oneOf": [{"type": "null"}, {"type": "integer"}]},
+                },
+            }
+        )
+        validator = SchemaValidator(schema_file)
+        result = validator.validate({"a": 5, "b": "7", "c": "9"}, coerce=True)
+        self.assertEqual(result, {"a": 5, "b": 7, "c": 9})
+
+    def test_validate_with_coerce_follows_references(self):
+        schema_file = self.create_schema_file(
+            {
+                "definitions": {
+                    "port": {"type": "integer"},
+                    "ports": {
+                        "type": "object",
+                        "properties": {
+                            "p": {"anyOf": [{"$ref": "#/definitions/port"}]},
+                            "q": {"$ref": "#/definitions/port"},
+                        },
+                    },
+                },
+                "$ref": "#/definitions/ports",
+            }
+        )
+        validator = SchemaValidator(schema_file)
+        result = validator.validate({"p": 80, "q": "5"}, coerce=True)
+        self.assertEqual(result, {"p": 80, "q": 5})
+
+    def test_validate_with_coerce_converts_durations(self):
+        schema_file = self.create_schema_file(
+            {
+                "type": "object",
+                "properties": {
+                    "timeout": {"type": "integer", "format": "duration"},
+                    "interval": {"type": "string", "format": "duration"},
+                    "grace": {"type": "string", "format": "duration"},
+                    "ttl": {"type": "string", "format": "duration"},
+                },
+            }
+        )
+        validator = SchemaValidator(schema_file)
+        result = validator.validate(
+            {"timeout": "1h30m", "interval": 90, "grace": "2d", "ttl": "PT5M"},
+            coerce=True,
+        )
+        self.assertEqual(
+            result,
+            {"timeout": 5400, "interval": "PT1M30S", "grace": "P2D", "ttl": "PT5M"},
+        )
+        with self.assertRaises(ValidationError):
+            validator.validate({"interval": "soon"}, coerce=True)
+
+    def test_validate_with_coerce_invalid_value(self):
+        schema_file = self.create_schema_file(
+            {"type": "object", "properties": {"port": {"type": "integer"}}}
+        )
+        validator = SchemaValidator(schema_file)
+        with self.assertRaises(ValidationError):
+            validator.validate({"port": "eighty"}, coerce=True)
+
+    def test_get_validator_reuses_validator(self):
+        self.assertIs(
+            get_validator(self.valid_schema_file), get_validator(self.valid_schema_file)
+        )
+
+    def test_get_validator_reloads_changed_schema(self):
+        validator = get_validator(self.valid_schema_file)
+        with open(self.valid_schema_file, "w") as f:
+            json.dump({"type": "object", "required": ["name", "age"]}, f)
+        reloaded = get_validator(self.valid_schema_file)
+        self.assertIsNot(validator, reloaded)
+        with self.assertRaises(ValidationError):
+            reloaded.validate({"name": "test"})
+
     def tearDown(self):
         self.temp_dir.cleanup()
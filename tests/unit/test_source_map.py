@@ -0,0 +1,73 @@
+import unittest
+
+from jinja2 import Environment
+
+from oot.parser import _render_with_source_map
+from oot.source_map import RenderedTemplate, SourceMap, original_line
+
+
+class TestOriginalLine(unittest.TestCase):
+    def test_no_shifts(self):
+        self.assertEqual(original_line(None, 3), 3)
+
+    def test_lines_before_shift(self):
+        self.assertEqual(original_line([(5, 2)], 4), 4)
+
+    def test_lines_inside_shift(self):
+        for line in (5, 6, 7):
+            self.assertEqual(original_line([(5, 2)], line), 5)
+
+    def test_lines_after_shifts(self):
+        self.assertEqual(original_line([(2, 1), (5, 2)], 10), 7)
+
+
+def source_map_for(source, variables, line_shifts=None):
+    template = Environment().from_string(source)
+    rendered, chunks = _render_with_source_map(template, variables)
+    code = template.root_render_func.__code__
+    rendered_template = RenderedTemplate(source, rendered, code, template._debug_info)
+    return SourceMap("t.yaml", chunks, lambda: rendered_template, line_shifts)
+
+
+def plain_source_map(text):
+    return SourceMap("t.yaml", [], lambda: RenderedTemplate(text, text, None, ""))
+
+
+class TestSourceMap(unittest.TestCase):
+    def setUp(self):
+        self.source = "a: 1\n{% if x %}\nb: 2\nc: [\n{% endif %}"
+
+    def test_template_line_static_text(self):
+        source_map = source_map_for(self.source, {"x": True})
+        self.assertEqual(source_map.template_line(0), 1)
+        self.assertEqual(source_map.template_line(2), 3)
+        self.assertEqual(source_map.template_line(3), 4)
+
+    def test_template_line_with_line_shifts(self):
+        source_map = source_map_for(self.source, {"x": True}, [(1, 1)])
+        self.assertEqual(source_map.template_line(3), 3)
+
+    def test_template_line_of_expression_output(self):
+        source = "a: 1\nb: {{ value }}\nc: 3\n"
+        source_map = source_map_for(source, {"value": "[\n  1,\n  2"})
+        self.assertEqual(source_map.template_line(3), 2)
+        self.assertEqual(source_map.template_line(4), 3)
+
+    def test_template_line_renders_only_when_needed(self):
+        calls = []
+        source_map = SourceMap("t.yaml", [], lambda: calls.append(1))
+        self.assertEqual(source_map.template_line(3), 4)
+        self.assertEqual(calls, [])
+
+    def test_describe(self):
+        source_map = source_map_for(self.source, {"x": True})
+        self.assertEqual(source_map.describe(3), "t.yaml:4")
+
+    def test_locate(self):
+        source_map = plain_source_map("a: 1\nb:\n  - x\n  - y\n")
+        self.assertEqual(source_map.locate(["data", "b", "1"]), 4)
+
+    def test_locate_unknown_path(self):
+        source_map = plain_source_map("a: 1\n")
+        self.assertIsNone(source_map.locate(["data", "missing"]))
+        self.assertIsNone(source_map.locate(None))